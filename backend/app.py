@@ -12,6 +12,13 @@ from routes import api_bp  # noqa: E402
 from werkzeug.middleware.proxy_fix import ProxyFix  # noqa: E402
 from flask_cors import CORS  # noqa: E402
 from utils.logger import setup_logging, install_api_request_logging  # noqa: E402
+from utils.metrics import metrics, install_metrics_endpoint  # noqa: E402
+from utils.cache import reference_cache  # noqa: E402
+from utils.auth import role_cache  # noqa: E402
+from utils.db_routing import install_read_your_writes  # noqa: E402
+from utils.json_provider import FastJSONProvider  # noqa: E402
+from utils.compression import compressed_cache, install_compression  # noqa: E402
+from utils.rate_limit import install_rate_limits  # noqa: E402
 
 
 def parse_origins(envval: str) -> list[str]:
@@ -29,6 +36,7 @@ api_logger = setup_logging('climbge-api')
 
 def create_app():
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
 
     # Cookies
     app.config.update(
@@ -50,8 +58,8 @@ def create_app():
         resources={r"/api/*": {"origins": allowed_origins}},
         supports_credentials=True,
         methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
-        allow_headers=["Content-Type", "Authorization"],
-        expose_headers=["Content-Type"],
+        allow_headers=["Content-Type", "Authorization", "If-None-Match"],
+        expose_headers=["Content-Type", "ETag"],
         max_age=3600,
     )
 
@@ -70,7 +78,14 @@ def create_app():
                 abort(403)
     app.register_blueprint(api_bp)
 
-    install_api_request_logging(app, api_logger)
+    metrics.track_cache(reference_cache)
+    metrics.track_cache(role_cache)
+    metrics.track_cache(compressed_cache)
+    install_api_request_logging(app, api_logger, metrics)
+    install_rate_limits(app)
+    install_read_your_writes(app)
+    install_compression(app)
+    install_metrics_endpoint(app)
 
     @app.get("/healthz")
     def healthz():
@@ -0,0 +1,226 @@
+"""
+ASGI entry point serving the async services (services/async_services.py).
+
+Covers the read-heavy endpoints plus commit-session, under the same /api
+paths and JSON shapes as the Flask app. It reads the Flask session cookie
+(same SECRET_KEY / SESSION_COOKIE_NAME), so a proxy can route these paths
+here and leave login and everything else on gunicorn. Needs an ASGI
+server, e.g.:
+
+    uvicorn asgi:app --port 9002 --workers 2
+"""
+import os
+import time
+from dotenv import load_dotenv
+env_file = os.environ.get('ENV_DIR', '.env')
+if os.path.exists(env_file):
+    load_dotenv(env_file)
+
+import falcon  # noqa: E402
+import falcon.asgi  # noqa: E402
+from flask import Flask  # noqa: E402
+from flask.sessions import SecureCookieSessionInterface  # noqa: E402
+from itsdangerous import BadSignature  # noqa: E402
+from utils import query_stats  # noqa: E402
+from utils.async_db import open_async_pool, close_async_pool  # noqa: E402
+from utils.json_provider import dumps_bytes  # noqa: E402
+from utils.logger import setup_logging  # noqa: E402
+from utils.security import SESSION_KEY  # noqa: E402
+from services import async_services  # noqa: E402
+
+api_logger = setup_logging('climbge-api')
+
+ALLOWED_ORIGINS = [o.strip() for o in (os.environ.get("ALLOWED_ORIGINS") or "").split(",") if o.strip()]
+
+
+def _session_serializer():
+    # Only used to verify and decode the cookie the Flask app issued.
+    flask_app = Flask("climbge-asgi")
+    flask_app.config.update(SECRET_KEY=os.environ.get("SECRET_KEY"))
+    return SecureCookieSessionInterface().get_signing_serializer(flask_app), int(
+        flask_app.permanent_session_lifetime.total_seconds()
+    )
+
+
+class SessionMiddleware:
+    """Sets req.context.user_id from the Flask session cookie (None when absent or invalid)."""
+
+    def __init__(self):
+        self.serializer, self.max_age = _session_serializer()
+        self.cookie_name = os.environ.get("SESSION_COOKIE_NAME") or "session"
+
+    async def process_request(self, req, resp):
+        req.context.user_id = None
+        values = req.get_cookie_values(self.cookie_name)
+        if not values or self.serializer is None:
+            return
+        try:
+            data = self.serializer.loads(values[0], max_age=self.max_age)
+        except BadSignature:
+            return
+        req.context.user_id = data.get(SESSION_KEY)
+
+
+class RequestLogMiddleware:
+    """Same log line as utils.logger.install_api_request_logging, plus pool open/close."""
+
+    async def process_startup(self, scope, event):
+        await open_async_pool()
+
+    async def process_shutdown(self, scope, event):
+        await close_async_pool()
+
+    async def process_request(self, req, resp):
+        req.context.start = time.perf_counter()
+        req.context.query_stats_token = query_stats.begin_request()
+        if req.method in ("POST", "PUT", "PATCH", "DELETE"):
+            origin = req.get_header("Origin") or ""
+            if origin and origin not in ALLOWED_ORIGINS:
+                api_logger.warning("blocked_origin method=%s path=%s origin=%s", req.method, req.path, origin)
+                raise falcon.HTTPForbidden()
+
+    async def process_response(self, req, resp, resource, req_succeeded):
+        start = getattr(req.context, "start", None)
+        dur_ms = (time.perf_counter() - start) * 1000 if start else -1
+        stats = query_stats.current_stats()
+        ip = (
+            req.get_header("CF-Connecting-IP")
+            or (req.get_header("X-Forwarded-For") or "").split(",")[0].strip()
+            or req.remote_addr
+        )
+        status = falcon.http_status_to_code(resp.status)
+        log = api_logger.warning if status >= 500 else api_logger.info
+        log(
+            "%s %s user=%s status=%s duration=%.1fms db_queries=%s db_ms=%.1f ip=%s",
+            req.method,
+            req.path,
+            getattr(req.context, "user_id", None) or "-",
+            status,
+            dur_ms,
+            stats.queries if stats else 0,
+            stats.total_ms if stats else 0.0,
+            ip,
+        )
+        token = getattr(req.context, "query_stats_token", None)
+        if token is not None:
+            query_stats.end_request(token)
+
+
+def _respond(resp, payload, status=200):
+    resp.media = payload
+    resp.status = status
+
+
+def _require_user(req, resp) -> str | None:
+    uid = req.context.user_id
+    if not uid:
+        _respond(resp, {"error": {"code": "unauthorized", "message": "Not logged in."}}, 401)
+    return uid
+
+
+class HistoryResource:
+    async def on_get(self, req, resp):
+        if uid := _require_user(req, resp):
+            _respond(resp, *await async_services.fetch_climb_history(
+                uid,
+                limit=req.get_param("limit"),
+                cursor=req.get_param("cursor"),
+                date_from=req.get_param("from"),
+                date_to=req.get_param("to"),
+            ))
+
+
+class LastClimbResource:
+    async def on_get(self, req, resp):
+        if uid := _require_user(req, resp):
+            _respond(resp, *await async_services.fetch_last_climb(uid))
+
+
+class WeeklySummaryResource:
+    async def on_get(self, req, resp):
+        if uid := _require_user(req, resp):
+            _respond(resp, *await async_services.fetch_weekly_stats(uid))
+
+
+class NewsResource:
+    async def on_get(self, req, resp):
+        if _require_user(req, resp):
+            _respond(resp, *await async_services.fetch_news())
+
+
+class GradesResource:
+    async def on_get(self, req, resp):
+        _respond(resp, await async_services.fetch_grades())
+
+
+class ClimbLocationsResource:
+    async def on_get(self, req, resp):
+        if _require_user(req, resp):
+            _respond(resp, await async_services.fetch_climb_locations())
+
+
+class MeResource:
+    async def on_get(self, req, resp):
+        uid = req.context.user_id
+        try:
+            profile = await async_services.fetch_user_profile(uid) if uid else None
+        except Exception:
+            api_logger.exception("me_profile failed")
+            profile = None
+        # The Flask /me also clears a stale session; this app never writes the cookie.
+        _respond(resp, {"authenticated": True, "profile": profile} if profile else {"authenticated": False})
+
+
+class BuddiesResource:
+    async def on_get(self, req, resp):
+        if uid := _require_user(req, resp):
+            _respond(resp, *await async_services.list_buddies(uid))
+
+
+class BuddyFeedResource:
+    async def on_get(self, req, resp):
+        if uid := _require_user(req, resp):
+            _respond(resp, *await async_services.buddy_feed(uid))
+
+
+class CommitSessionResource:
+    async def on_post(self, req, resp):
+        if uid := _require_user(req, resp):
+            payload = await req.get_media(default_when_empty={})
+            _respond(resp, *await async_services.commit_session_service(uid, payload or {}))
+
+
+class HealthResource:
+    async def on_get(self, req, resp):
+        _respond(resp, {"status": "ok"})
+
+
+def create_app():
+    app = falcon.asgi.App(middleware=[
+        falcon.CORSMiddleware(
+            allow_origins=ALLOWED_ORIGINS,
+            allow_credentials=ALLOWED_ORIGINS,
+            expose_headers=["Content-Type", "ETag"],
+        ),
+        RequestLogMiddleware(),
+        SessionMiddleware(),
+    ])
+    # Same encoder as the Flask app, so both return identical bodies.
+    json_handler = falcon.media.JSONHandler(dumps=dumps_bytes)
+    app.resp_options.media_handlers[falcon.MEDIA_JSON] = json_handler
+
+    app.add_route("/healthz", HealthResource())
+    app.add_route("/api/history", HistoryResource())
+    app.add_route("/api/last-climb", LastClimbResource())
+    app.add_route("/api/weekly-summary", WeeklySummaryResource())
+    app.add_route("/api/news", NewsResource())
+    app.add_route("/api/grades", GradesResource())
+    app.add_route("/api/climb-locations", ClimbLocationsResource())
+    app.add_route("/api/me", MeResource())
+    app.add_route("/api/buddies", BuddiesResource())
+    app.add_route("/api/buddies/feed", BuddyFeedResource())
+    app.add_route("/api/commit-session", CommitSessionResource())
+    return app
+
+
+app = create_app()
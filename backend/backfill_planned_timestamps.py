@@ -0,0 +1,36 @@
+"""
+Fill planned_climbs.planned_timestamp for plans saved before the column
+existed, using PLANNED_CLIMB_TIMEZONE (the same zone the API assumes for
+them). Run this before migrations/005_planned_timestamp_not_null.sql, and
+both before the API release that relies on 005 goes live (see the migration).
+
+    python backfill_planned_timestamps.py
+    python backfill_planned_timestamps.py --batch-size 1000
+"""
+import argparse
+import os
+from dotenv import load_dotenv
+env_file = os.environ.get('ENV_DIR', '.env')
+if os.path.exists(env_file):
+    load_dotenv(env_file)
+
+from utils.logger import setup_logging  # noqa: E402
+from services.buddy_service import (  # noqa: E402
+    DEFAULT_PLANNED_CLIMB_TIMEZONE,
+    PLANNED_CLIMB_BACKFILL_BATCH,
+    backfill_planned_timestamps,
+)
+
+setup_logging('climbge-api')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=PLANNED_CLIMB_BACKFILL_BATCH, help="rows per transaction")
+    args = parser.parse_args()
+    updated = backfill_planned_timestamps(args.batch_size)
+    print(f"backfilled planned_timestamp on {updated} plans (timezone {DEFAULT_PLANNED_CLIMB_TIMEZONE})")
+
+
+if __name__ == "__main__":
+    main()
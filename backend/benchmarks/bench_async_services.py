@@ -0,0 +1,114 @@
+"""
+500 concurrent home-screen loads (history page, last climb, weekly stats,
+buddy feed) through the sync services on a thread pool against the same
+reads through services.async_services on one event loop.
+
+The sync runs use --threads (what gunicorn gthread gives you: workers x
+threads) and one thread per caller. Both sides use DB_POOL_MAX_SIZE
+connections, so the database is equally limited; the difference is how many
+callers can be in flight and what each costs while it waits.
+
+Runs against the database configured in .env (DB_*); read-only.
+
+    cd backend && python -m benchmarks.bench_async_services --user-id <uuid> --concurrency 500
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+load_dotenv(os.environ.get("ENV_DIR", ".env"))
+
+from utils.connect_db import pool, DB_POOL_MAX_SIZE  # noqa: E402
+from utils.async_db import open_async_pool, close_async_pool  # noqa: E402
+from services import async_services  # noqa: E402
+from services.buddy_service import buddy_feed  # noqa: E402
+from services.history_service import fetch_climb_history, fetch_last_climb, fetch_weekly_stats  # noqa: E402
+
+
+# Latency is measured from submission, so it includes any wait for a thread
+# or a connection.
+def _sync_call(uid, submitted):
+    for fn in (
+        lambda u: fetch_climb_history(u, limit=20),
+        fetch_last_climb,
+        fetch_weekly_stats,
+        buddy_feed,
+    ):
+        _, status = fn(uid)
+        assert status == 200, status
+    return (time.perf_counter() - submitted) * 1000
+
+
+async def _async_call(uid, submitted):
+    for fn in (
+        lambda u: async_services.fetch_climb_history(u, limit=20),
+        async_services.fetch_last_climb,
+        async_services.fetch_weekly_stats,
+        async_services.buddy_feed,
+    ):
+        _, status = await fn(uid)
+        assert status == 200, status
+    return (time.perf_counter() - submitted) * 1000
+
+
+def _summary(label, wall_s, latencies, threads):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{label:>18} {len(latencies) / wall_s:>9.0f} {statistics.median(latencies):>9.1f} "
+        f"{p99:>9.1f} {threads:>8}"
+    )
+
+
+def _run_sync(uid, concurrency, threads):
+    peak = threading.active_count()
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        start = time.perf_counter()
+        futures = [ex.submit(_sync_call, uid, time.perf_counter()) for _ in range(concurrency)]
+        peak = max(peak, threading.active_count())
+        latencies = [f.result() for f in futures]
+        wall = time.perf_counter() - start
+    return wall, latencies, peak
+
+
+async def _run_async(uid, concurrency):
+    await open_async_pool()
+    try:
+        warm = time.perf_counter()
+        await asyncio.gather(*(_async_call(uid, warm) for _ in range(min(concurrency, DB_POOL_MAX_SIZE))))
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(_async_call(uid, start) for _ in range(concurrency)))
+        wall = time.perf_counter() - start
+    finally:
+        await close_async_pool()
+    return wall, latencies, threading.active_count()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", required=True)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=16, help="sync thread cap (gunicorn workers x threads)")
+    args = parser.parse_args()
+
+    pool.wait()
+    _run_sync(args.user_id, DB_POOL_MAX_SIZE, DB_POOL_MAX_SIZE)  # warm up
+
+    print(f"concurrency={args.concurrency} db_pool_max_size={DB_POOL_MAX_SIZE} (4 queries per call)")
+    print(f"{'variant':>18} {'calls/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'threads':>8}")
+    _summary(f"sync {args.threads} threads", *_run_sync(args.user_id, args.concurrency, args.threads))
+    _summary(
+        f"sync {args.concurrency} threads",
+        *_run_sync(args.user_id, args.concurrency, args.concurrency),
+    )
+    _summary("async", *asyncio.run(_run_async(args.user_id, args.concurrency)))
+
+
+if __name__ == "__main__":
+    main()
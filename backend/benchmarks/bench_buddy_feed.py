@@ -0,0 +1,179 @@
+"""
+buddy_feed for a caller in one large synthetic group: the old three-query
+feed (plans capped in Python) against the single top-N statement.
+
+Runs against the database configured in .env (DB_*). The synthetic users,
+group, sessions and plans are created inside one transaction that is rolled
+back at the end, so nothing is persisted.
+
+    cd backend && python -m benchmarks.bench_buddy_feed --members 500 --plans-per-member 8
+"""
+import argparse
+import os
+import statistics
+import time
+import uuid
+
+from dotenv import load_dotenv
+
+load_dotenv(os.environ.get("ENV_DIR", ".env"))
+
+from psycopg.rows import dict_row  # noqa: E402
+from utils.connect_db import pool  # noqa: E402
+from services.buddy_service import (  # noqa: E402
+    MAX_FEED_PLANS_PER_BUDDY,
+    PLANNED_CLIMB_UPCOMING_SQL,
+    buddy_feed_from_rows,
+    buddy_feed_statements,
+)
+
+# The old feed: buddy list, last climbs and all upcoming plans as
+# separate statements, with the per-buddy cap applied in Python.
+LEGACY_MEMBERS_SQL = """
+    SELECT DISTINCT p.user_id, p.username, p.name
+    FROM public.buddy_members me
+    JOIN public.buddy_members other ON other.buddy_id = me.buddy_id
+    JOIN public.user_profile p ON p.user_id = other.user_id
+    WHERE me.user_id = %s AND other.user_id <> %s
+    ORDER BY p.name
+    """
+
+LEGACY_LAST_CLIMBS_SQL = """
+    SELECT lcs.user_id, lcs.location, lcs.climb_date
+    FROM public.last_climb_session lcs
+    WHERE lcs.user_id IN (
+        SELECT other.user_id
+        FROM public.buddy_members me
+        JOIN public.buddy_members other ON other.buddy_id = me.buddy_id
+        WHERE me.user_id = %s AND other.user_id <> %s
+    )
+    """
+
+LEGACY_PLANS_SQL = (
+    """
+    SELECT DISTINCT pc.id, pc.user_id, pc.gym, pc.city, pc.country,
+           pc.planned_date, pc.planned_time, pc.planned_timestamp
+    FROM public.planned_climbs pc
+    JOIN public.planned_climb_groups pcg ON pcg.planned_climb_id = pc.id
+    JOIN public.buddy_members me ON me.buddy_id = pcg.buddy_id AND me.user_id = %s
+    WHERE pc.user_id <> %s AND
+    """
+    + PLANNED_CLIMB_UPCOMING_SQL
+    + """
+    ORDER BY pc.planned_timestamp ASC
+    """
+)
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _seed(cur, members: int, plans_per_member: int) -> str:
+    tag = uuid.uuid4().hex[:8]
+    cur.execute(
+        """
+        INSERT INTO public.users (username, password)
+        SELECT 'bench_' || %s || '_' || i, 'x'
+        FROM generate_series(0, %s) AS i
+        RETURNING user_id
+        """,
+        (tag, members),
+    )
+    user_ids = [r["user_id"] for r in cur.fetchall()]
+    caller = user_ids[0]
+
+    cur.execute(
+        "INSERT INTO public.buddies (name, created_by) VALUES (%s, %s) RETURNING id",
+        (f"bench {tag}", caller),
+    )
+    buddy_id = cur.fetchone()["id"]
+    cur.execute(
+        """
+        INSERT INTO public.buddy_members (buddy_id, user_id, user_role)
+        SELECT %s, u, CASE WHEN u = %s THEN 'owner' ELSE 'viewer' END
+        FROM unnest(%s::uuid[]) AS u
+        """,
+        (buddy_id, caller, user_ids),
+    )
+    cur.execute(
+        """
+        INSERT INTO public.climb_sessions (user_id, started_at, ended_at, location)
+        SELECT u, now() - interval '3 days', now() - interval '3 days' + interval '2 hours', 'Bench Gym'
+        FROM unnest(%s::uuid[]) AS u
+        """,
+        (user_ids[1:],),
+    )
+    cur.execute(
+        """
+        WITH plans AS (
+            INSERT INTO public.planned_climbs (user_id, gym, planned_date, planned_timestamp)
+            SELECT u, 'Bench Gym', (now() + n * interval '1 day')::date, now() + n * interval '1 day'
+            FROM unnest(%s::uuid[]) AS u, generate_series(1, %s) AS n
+            RETURNING id
+        )
+        INSERT INTO public.planned_climb_groups (planned_climb_id, buddy_id)
+        SELECT id, %s FROM plans
+        """,
+        (user_ids[1:], plans_per_member, buddy_id),
+    )
+    return str(caller)
+
+
+def _legacy_feed(cur, uid):
+    cur.execute(LEGACY_MEMBERS_SQL, (uid, uid))
+    buddies = cur.fetchall()
+    cur.execute(LEGACY_LAST_CLIMBS_SQL, (uid, uid))
+    last_by_user = {str(r["user_id"]): r for r in cur.fetchall()}
+    cur.execute(LEGACY_PLANS_SQL, (uid, uid))
+    plans_by_user = {}
+    rows = cur.fetchall()
+    for r in rows:
+        bucket = plans_by_user.setdefault(str(r["user_id"]), [])
+        if len(bucket) < MAX_FEED_PLANS_PER_BUDDY:
+            bucket.append(r)
+    return len(buddies), len(rows), len(last_by_user)
+
+
+def _new_feed(cur, uid):
+    (sql, params), = buddy_feed_statements(uid)
+    cur.execute(sql, params)
+    rows = cur.fetchall()
+    return len(buddy_feed_from_rows(rows)["buddies"]), len(rows)
+
+
+def _time(fn, cur, uid, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(cur, uid)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=500)
+    parser.add_argument("--plans-per-member", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    try:
+        with pool.connection() as conn, conn.transaction(), conn.cursor(row_factory=dict_row) as cur:
+            uid = _seed(cur, args.members, args.plans_per_member)
+            cur.execute("ANALYZE")
+            legacy_ms, (buddies, legacy_rows, _) = _time(_legacy_feed, cur, uid, args.repeat)
+            new_ms, (new_buddies, new_rows) = _time(_new_feed, cur, uid, args.repeat)
+            raise _Rollback
+    except _Rollback:
+        pass
+
+    print(f"members={args.members} plans/member={args.plans_per_member} buddies_in_feed={buddies}/{new_buddies}")
+    print(f"{'variant':>10} {'median ms':>10} {'rows fetched':>13}")
+    print(f"{'legacy':>10} {legacy_ms:>10.2f} {legacy_rows + 2 * buddies:>13}")
+    print(f"{'single':>10} {new_ms:>10.2f} {new_rows:>13}")
+    print(f"speedup {legacy_ms / new_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Commit-session latency vs. route count: per-row INSERTs against the batched
+insert_session_routes.
+
+Runs against the database configured in .env (DB_*), inside transactions
+that are always rolled back, so nothing is persisted.
+
+    cd backend && python -m benchmarks.bench_session_routes --user-id <uuid>
+"""
+import argparse
+import os
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+
+load_dotenv(os.environ.get("ENV_DIR", ".env"))
+
+from psycopg.rows import dict_row  # noqa: E402
+from utils.connect_db import pool  # noqa: E402
+from services.climb_service import insert_session, insert_session_routes  # noqa: E402
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _routes(n: int):
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "grade_system": 999 if i % 10 == 0 else 1,
+            "grade_system_label": "Bench",
+            "grade_label": f"V{i % 8}",
+            "attempts": 1 + i % 3,
+            "sent": i % 2 == 0,
+            "sent_at": now.isoformat() if i % 2 == 0 else None,
+        }
+        for i in range(n)
+    ]
+
+
+def _insert_routes_per_row(cur, *, session_id, routes):
+    # The pre-batching implementation: one round trip per row.
+    for r in routes:
+        cur.execute(
+            """
+            INSERT INTO session_routes (
+                session_id, grade_system, grade_label, attempts, sent, sent_at, description
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """,
+            (session_id, r["grade_system"], r["grade_label"], r["attempts"], r["sent"], r["sent_at"], None),
+        )
+        if r["grade_system"] == 999:
+            cur.execute(
+                "INSERT INTO unknown_grade_systems (grade_id, grade_system, grades) VALUES (%s, %s, %s)",
+                (999, r["grade_system_label"], r["grade_label"]),
+            )
+
+
+def _time_commit(user_id, routes, insert_routes) -> float:
+    now = datetime.now(timezone.utc)
+    start = time.perf_counter()
+    try:
+        with pool.connection() as conn, conn.transaction():
+            with conn.cursor(row_factory=dict_row) as cur:
+                session_id = insert_session(
+                    cur,
+                    user_id=user_id,
+                    started_at=(now - timedelta(hours=2)).isoformat(),
+                    ended_at=now.isoformat(),
+                    notes="benchmark",
+                    location=None,
+                )
+                insert_routes(cur, session_id=session_id, routes=routes)
+            elapsed = time.perf_counter() - start
+            raise _Rollback
+    except _Rollback:
+        pass
+    return elapsed * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", required=True, help="existing users.user_id to attach the sessions to")
+    parser.add_argument("--counts", default="1,10,20,40,80,160")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'routes':>7} {'per-row ms':>12} {'batched ms':>12} {'speedup':>8}")
+    for n in (int(c) for c in args.counts.split(",")):
+        routes = _routes(n)
+        legacy = [_time_commit(args.user_id, routes, _insert_routes_per_row) for _ in range(args.repeat)]
+        batched = [_time_commit(args.user_id, routes, insert_session_routes) for _ in range(args.repeat)]
+        lm, bm = statistics.median(legacy), statistics.median(batched)
+        print(f"{n:>7} {lm:>12.2f} {bm:>12.2f} {lm / bm:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+gunicorn server hooks (docker-compose passes -c gunicorn.conf.py).
+
+The master never imports the app, so the metrics helpers are imported inside
+the hooks; utils.metrics does not open the DB pool on import.
+"""
+import os
+from dotenv import load_dotenv
+env_file = os.environ.get('ENV_DIR', '.env')
+if os.path.exists(env_file):
+    load_dotenv(env_file)
+
+
+def on_starting(server):
+    from utils.metrics import clear_multiproc_dir
+
+    clear_multiproc_dir()
+
+
+def worker_exit(server, worker):
+    # Runs in the worker: write its last counters before child_exit archives them.
+    from utils.metrics import metrics
+
+    metrics.flush()
+
+
+def child_exit(server, worker):
+    from utils.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
@@ -0,0 +1,20 @@
+-- Durable job queue consumed by worker.py (claimed with FOR UPDATE SKIP LOCKED).
+CREATE TABLE IF NOT EXISTS public.background_jobs (
+    id            bigserial PRIMARY KEY,
+    job_type      text        NOT NULL,
+    payload       jsonb       NOT NULL DEFAULT '{}'::jsonb,
+    status        text        NOT NULL DEFAULT 'pending'
+                  CHECK (status IN ('pending', 'running', 'done', 'failed')),
+    attempts      integer     NOT NULL DEFAULT 0,
+    max_attempts  integer     NOT NULL DEFAULT 5,
+    run_at        timestamptz NOT NULL DEFAULT now(),
+    locked_at     timestamptz,
+    last_error    text,
+    created_at    timestamptz NOT NULL DEFAULT now(),
+    updated_at    timestamptz NOT NULL DEFAULT now()
+);
+
+-- Only claimable rows are indexed, so the index stays small as done jobs pile up.
+CREATE INDEX IF NOT EXISTS background_jobs_claim_idx
+    ON public.background_jobs (run_at)
+    WHERE status IN ('pending', 'running');
@@ -0,0 +1,54 @@
+-- Per-user climbing summaries, maintained by services/stats_service.py in the
+-- same transaction that commits a session. climb_session_stats stores
+-- climber_session_history rows; stats_service.py defines the other two
+-- (latest session, Monday-based week of climb_date).
+-- Repair drift with: python rebuild_climb_stats.py [--user <uuid>]
+CREATE TABLE IF NOT EXISTS public.climb_session_stats (
+    user_id      uuid    NOT NULL,
+    climb_date   date    NOT NULL,
+    session_seq  integer NOT NULL,
+    sent         bigint,
+    attempted    bigint,
+    flashes      bigint,
+    best         text,
+    location     text,
+    PRIMARY KEY (user_id, climb_date, session_seq)
+);
+
+CREATE TABLE IF NOT EXISTS public.user_last_climb (
+    user_id      uuid    PRIMARY KEY,
+    location     text,
+    climb_date   date    NOT NULL,
+    best         text,
+    sent         bigint,
+    attempted    bigint
+);
+
+CREATE TABLE IF NOT EXISTS public.user_weekly_stats (
+    user_id        uuid    NOT NULL,
+    week_start     date    NOT NULL,
+    total_session  bigint  NOT NULL,
+    sent           bigint,
+    attempted      bigint,
+    PRIMARY KEY (user_id, week_start)
+);
+
+-- Initial fill; the same statements as stats_service.rebuild_climb_stats().
+BEGIN;
+TRUNCATE public.climb_session_stats, public.user_last_climb, public.user_weekly_stats;
+
+INSERT INTO public.climb_session_stats
+    (user_id, climb_date, session_seq, sent, attempted, flashes, best, location)
+SELECT user_id, climb_date, session_seq, sent, attempted, flashes, best, location
+FROM public.climber_session_history;
+
+INSERT INTO public.user_last_climb (user_id, location, climb_date, best, sent, attempted)
+SELECT DISTINCT ON (user_id) user_id, location, climb_date, best, sent, attempted
+FROM public.climb_session_stats
+ORDER BY user_id, climb_date DESC, session_seq DESC;
+
+INSERT INTO public.user_weekly_stats (user_id, week_start, total_session, sent, attempted)
+SELECT user_id, date_trunc('week', climb_date::timestamp)::date, count(*), sum(sent), sum(attempted)
+FROM public.climb_session_stats
+GROUP BY user_id, date_trunc('week', climb_date::timestamp)::date;
+COMMIT;
@@ -0,0 +1,6 @@
+-- climber_session_history aggregates session_routes per session, and
+-- refresh_user_climb_stats runs it over the days touched by every commit and
+-- bulk import (rebuild_climb_stats over whole histories). Without this index each session scans
+-- session_routes. (Postgres does not index foreign keys on its own.)
+CREATE INDEX IF NOT EXISTS session_routes_session_id_idx
+    ON public.session_routes (session_id);
@@ -0,0 +1,9 @@
+-- The approval queue views select submissions by status, and
+-- get_approval_queue pages them by primary key. With (status, id) the queue
+-- is read from the index instead of scanning every approved grade system and
+-- gym, however large those tables grow.
+CREATE INDEX IF NOT EXISTS grade_systems_status_idx
+    ON public.grade_systems (status, grade_id);
+
+CREATE INDEX IF NOT EXISTS climbing_locations_status_idx
+    ON public.climbing_locations (status, id);
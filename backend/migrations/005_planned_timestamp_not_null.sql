@@ -0,0 +1,19 @@
+-- Every plan now carries planned_timestamp, so "upcoming" is a plain range
+-- (planned_timestamp > now()) instead of an OR with a per-row computed
+-- timestamp, and list_planned_climbs / the buddy feed can read it from the
+-- index in order.
+--
+-- Deploy order:
+--   1. With the previous API release still serving, run
+--      `python backfill_planned_timestamps.py` (e.g. in a one-off container of
+--      the new image). It fills legacy rows in PLANNED_CLIMB_TIMEZONE, which
+--      SQL alone cannot know.
+--   2. Apply this migration. SET NOT NULL fails (and nothing changes) if any
+--      row is still missing its timestamp.
+--   3. Roll out the new API release. It no longer computes a timestamp for
+--      legacy rows, so deploying it before step 1 would hide their plans.
+ALTER TABLE public.planned_climbs
+    ALTER COLUMN planned_timestamp SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS planned_climbs_user_timestamp_idx
+    ON public.planned_climbs (user_id, planned_timestamp);
@@ -0,0 +1,27 @@
+-- Position of grade_label in its grade system's `grades` array (0 = easiest),
+-- written on insert from the in-memory GradeRegistry (services/climb_service.py).
+-- NULL for the "Other" system and labels that are not in the array. Sends can
+-- then be compared as integers, e.g. the hardest send in a system:
+--   ... WHERE sent AND grade_system = $1 ORDER BY grade_rank DESC NULLS LAST
+ALTER TABLE public.session_routes
+    ADD COLUMN IF NOT EXISTS grade_rank smallint;
+
+-- Existing routes, matched on lower(btrim(label)) like the registry
+-- (climb_service.grade_label_key). After this, approving a grade system
+-- re-ranks its routes with climb_service.REFRESH_GRADE_RANKS_SQL.
+UPDATE public.session_routes r
+SET grade_rank = g.ordinal - 1
+FROM (
+    SELECT gs.grade_id, lower(btrim(u.label)) AS label, min(u.ordinal) AS ordinal
+    FROM public.grade_systems gs
+    CROSS JOIN LATERAL unnest(gs.grades) WITH ORDINALITY AS u(label, ordinal)
+    WHERE gs.grade_id <> 999
+    GROUP BY gs.grade_id, lower(btrim(u.label))
+) g
+WHERE r.grade_rank IS NULL
+  AND g.grade_id = r.grade_system
+  AND g.label = lower(btrim(r.grade_label));
+
+CREATE INDEX IF NOT EXISTS session_routes_sent_rank_idx
+    ON public.session_routes (grade_system, grade_rank DESC)
+    WHERE sent;
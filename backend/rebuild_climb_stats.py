@@ -0,0 +1,30 @@
+"""
+Rebuild the per-user climbing summary tables from climb_sessions and
+session_routes, to repair drift (e.g. after editing sessions by hand).
+
+    python rebuild_climb_stats.py               # everyone
+    python rebuild_climb_stats.py --user <uuid> # one user
+"""
+import argparse
+import os
+from dotenv import load_dotenv
+env_file = os.environ.get('ENV_DIR', '.env')
+if os.path.exists(env_file):
+    load_dotenv(env_file)
+
+from utils.logger import setup_logging  # noqa: E402
+from services.stats_service import rebuild_climb_stats  # noqa: E402
+
+setup_logging('climbge-api')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user", help="only rebuild this user_id")
+    args = parser.parse_args()
+    sessions = rebuild_climb_stats(args.user)
+    print(f"rebuilt climb stats for {args.user or 'all users'}: {sessions} sessions")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,8 @@ from .user_stats import stats_bp
 from .climb import climb_bp
 from .news import news_bp
 from .buddy import buddy_bp
+from .admin import admin_bp
+from .dashboard import dashboard_bp
 
 api_bp = Blueprint("api", __name__, url_prefix="/api")
 api_bp.register_blueprint(auth_bp)
@@ -15,3 +17,5 @@ api_bp.register_blueprint(stats_bp)
 api_bp.register_blueprint(climb_bp)
 api_bp.register_blueprint(news_bp)
 api_bp.register_blueprint(buddy_bp)
+api_bp.register_blueprint(admin_bp)
+api_bp.register_blueprint(dashboard_bp)
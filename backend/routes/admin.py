@@ -0,0 +1,12 @@
+from flask import Blueprint
+from utils.auth import admin_required
+from services.admin_service import fetch_pool_stats
+
+admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
+
+
+@admin_bp.get("/pool-stats")
+@admin_required
+def pool_stats():
+    payload, status = fetch_pool_stats()
+    return payload, status
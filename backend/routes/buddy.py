@@ -1,6 +1,7 @@
 # routes/buddy.py
 from flask import Blueprint, request
 from utils.auth import login_required
+from utils.http import conditional_get
 from utils.security import current_user_id
 from services.buddy_service import (
     list_buddies, create_buddy, get_buddy, rename_buddy, leave_buddy, remove_buddy_member,
@@ -14,6 +15,7 @@ buddy_bp = Blueprint("buddy", __name__)
 # ---------- Groups ----------
 @buddy_bp.get("/buddies")
 @login_required
+@conditional_get()
 def api_list_buddies():
     payload, status = list_buddies(current_user_id())
     return payload, status
@@ -2,13 +2,17 @@
 from __future__ import annotations
 from flask import Blueprint, jsonify, request
 from utils.auth import login_required
+from utils.cache import reference_cache, GRADES_KEY, CLIMB_LOCATIONS_KEY
+from utils.http import conditional_get
 from utils.security import current_user_id
 from services.climb_service import fetch_grades, commit_session_service, fetch_climb_locations
+from services.import_service import import_sessions
 
 climb_bp = Blueprint("climb", __name__)
 
 # ---------- Grade systems ----------
 @climb_bp.get("/grades")
+@conditional_get(version=lambda: reference_cache.etag(GRADES_KEY), private=False)
 def api_get_grade_systems():
     """
     Fetch available grade systems
@@ -31,9 +35,24 @@ def api_commit_session():
     body, status = commit_session_service(uid, payload)
     return jsonify(body), status
 
+# ---------- Import sessions ----------
+@climb_bp.post("/import-sessions")
+@login_required
+def api_import_sessions():
+    """
+    Bulk-import past sessions from a CSV or NDJSON upload (one row per route).
+    The format comes from ?format= or the Content-Type.
+    """
+    fmt = request.args.get("format")
+    if not fmt:
+        fmt = "ndjson" if request.mimetype in ("application/x-ndjson", "application/jsonl") else "csv"
+    body, status = import_sessions(current_user_id(), request.stream, fmt)
+    return jsonify(body), status
+
 # --------- Climb locations ---------
 @climb_bp.get("/climb-locations")
 @login_required
+@conditional_get(version=lambda: reference_cache.etag(CLIMB_LOCATIONS_KEY))
 def api_get_climb_locations():
     """
     Fetch active climb locations
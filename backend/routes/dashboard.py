@@ -0,0 +1,13 @@
+from flask import Blueprint
+from utils.auth import login_required
+from utils.security import current_user_id
+from services.dashboard_service import fetch_dashboard
+
+dashboard_bp = Blueprint("dashboard", __name__)
+
+
+@dashboard_bp.get("/dashboard")
+@login_required
+def get_dashboard():
+    payload, status = fetch_dashboard(current_user_id())
+    return payload, status
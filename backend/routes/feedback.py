@@ -38,7 +38,17 @@ def add_grade_system():
 @feedback_bp.get("/approval-queue")
 @approver_required
 def approval_queue():
-    payload, status = fetch_approval_queue()
+    args = request.args
+    payload, status = fetch_approval_queue(
+        item_type=args.get("type"),
+        limit=args.get("limit"),
+        grade_cursor=args.get("grade_cursor"),
+        location_cursor=args.get("location_cursor"),
+        status=args.get("status"),
+        country=args.get("country"),
+        submitter=args.get("submitter"),
+        climb_type=args.get("climb_type"),
+    )
     return payload, status
 
 
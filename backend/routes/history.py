@@ -1,19 +1,42 @@
 from __future__ import annotations
-from flask import Blueprint, jsonify, session
+from flask import Blueprint, jsonify, request, session
 from utils.auth import login_required
-from services.history_service import fetch_climb_history, fetch_last_climb, fetch_weekly_stats
+from utils.http import conditional_get
+from services.history_service import export_history, fetch_climb_history, fetch_last_climb, fetch_weekly_stats
 from utils.security import SESSION_KEY
 
 history_bp = Blueprint("history", __name__)
 
 @history_bp.get("/history")
 @login_required
+@conditional_get()
 def get_history():
     uid = session[SESSION_KEY]
-    payload, status = fetch_climb_history(uid)
+    payload, status = fetch_climb_history(
+        uid,
+        limit=request.args.get("limit"),
+        cursor=request.args.get("cursor"),
+        date_from=request.args.get("from"),
+        date_to=request.args.get("to"),
+    )
     return jsonify(payload), status
 
 
+@history_bp.get("/history/export")
+@login_required
+def get_history_export():
+    uid = session[SESSION_KEY]
+    payload, status = export_history(
+        uid,
+        fmt=request.args.get("format", "csv"),
+        date_from=request.args.get("from"),
+        date_to=request.args.get("to"),
+    )
+    if status != 200:
+        return jsonify(payload), status
+    return payload
+
+
 @history_bp.get("/last-climb")
 @login_required
 def get_last_climb():
@@ -1,11 +1,14 @@
 from flask import Blueprint
 from utils.auth import login_required
+from utils.cache import reference_cache, NEWS_KEY
+from utils.http import conditional_get
 from services.news_service import fetch_news
 
 news_bp = Blueprint("news", __name__)
 
 @news_bp.get("/news")
 @login_required
+@conditional_get(version=lambda: reference_cache.etag(NEWS_KEY))
 def get_news():
     payload, status = fetch_news()
     return payload, status
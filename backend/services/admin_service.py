@@ -0,0 +1,20 @@
+import logging
+import os
+from utils.connect_db import pool_stats
+from utils.http import err
+
+logger = logging.getLogger("climbge-api")
+
+
+def fetch_pool_stats():
+    """Live connection pool counters for this worker (waiting requests, wait time, connections in use)."""
+    try:
+        stats = pool_stats()
+    except Exception:
+        logger.exception("pool_stats failed")
+        return err("server_error", "Could not read pool statistics.", 500)
+
+    counters = stats["stats"]
+    stats["connections_in_use"] = counters.get("pool_size", 0) - counters.get("pool_available", 0)
+    stats["worker_pid"] = os.getpid()
+    return stats, 200
@@ -0,0 +1,175 @@
+"""
+Coroutine versions of the read-heavy service functions plus session commit,
+over utils.async_db.async_pool. They share SQL and row shaping with the sync
+services and return the same (payload, status) pairs. Errors are plain dicts,
+because utils.http.err() builds a Flask response.
+
+Served by asgi.py. The Flask app keeps using the sync services.
+"""
+import logging
+from psycopg.rows import dict_row
+from utils.async_db import async_pool
+from utils.cache import reference_cache, GRADES_KEY, CLIMB_LOCATIONS_KEY, NEWS_KEY
+from services.buddy_service import LIST_BUDDIES_SQL, buddies_from_rows, buddy_feed_statements, buddy_feed_from_rows
+from services.climb_service import (
+    CLIMB_LOCATIONS_SQL,
+    GRADES_SQL,
+    INSERT_SESSION_ROUTE_SQL,
+    INSERT_SESSION_SQL,
+    INSERT_UNKNOWN_GRADE_SQL,
+    climb_locations_from_rows,
+    grade_registry_for,
+    grades_from_rows,
+    session_params,
+    session_route_rows,
+)
+from services.history_service import (
+    LAST_CLIMB_SQL,
+    WEEKLY_STATS_SQL,
+    climb_history_from_rows,
+    climb_history_query,
+    last_climb_from_row,
+    parse_history_params,
+    weekly_stats_from_row,
+)
+from services.news_service import NEWS_SQL
+from services.stats_service import CLIMB_STATS_TIMEZONE, user_climb_stats_statements
+from services.user_profile_service import USER_PROFILE_SQL, user_profile_from_row
+
+logger = logging.getLogger("climbge-api")
+
+
+def _err(code: str, message: str, status: int):
+    return {"error": {"code": code, "message": message}}, status
+
+
+async def _fetch(sql, params=None, *, one=False):
+    async with async_pool.connection() as conn, conn.cursor(row_factory=dict_row) as cur:
+        await cur.execute(sql, params)
+        return await (cur.fetchone() if one else cur.fetchall())
+
+
+async def _cached(key, sql, shape):
+    # Same reference cache as the sync loaders; a concurrent miss may load twice.
+    sentinel = object()
+    value = reference_cache.get(key, sentinel)
+    if value is not sentinel:
+        return value
+    return reference_cache.set(key, shape(await _fetch(sql)))
+
+
+# ---------- History ----------
+async def fetch_climb_history(user_id: str, *, limit=None, cursor=None, date_from=None, date_to=None):
+    limit, cursor_key, date_from, date_to, error = parse_history_params(limit, cursor, date_from, date_to)
+    if error:
+        return error
+    sql, params = climb_history_query(user_id, limit, cursor_key, date_from, date_to)
+    try:
+        rows = await _fetch(sql, params)
+        return climb_history_from_rows(rows, limit), 200
+    except Exception:
+        logger.exception("history fetch failed user_id=%s", user_id)
+        return _err("db_error", "Could not fetch history!", 500)
+
+
+async def fetch_last_climb(user_id: str):
+    try:
+        return last_climb_from_row(await _fetch(LAST_CLIMB_SQL, (user_id,), one=True)), 200
+    except Exception:
+        logger.exception("last_climb fetch failed user_id=%s", user_id)
+        return _err("db_error", "Could not fetch last climb data!", 500)
+
+
+async def fetch_weekly_stats(user_id: str):
+    try:
+        return weekly_stats_from_row(await _fetch(WEEKLY_STATS_SQL, (user_id, CLIMB_STATS_TIMEZONE), one=True)), 200
+    except Exception:
+        logger.exception("weekly_stats fetch failed user_id=%s", user_id)
+        return _err("db_error", "Could not fetch weekly climb statistics!", 500)
+
+
+# ---------- Reference data ----------
+async def fetch_news():
+    try:
+        return {"news": await _cached(NEWS_KEY, NEWS_SQL, list)}, 200
+    except Exception:
+        logger.exception("news fetch failed")
+        return _err("db_error", "Could not fetch news post!", 500)
+
+
+async def fetch_grades():
+    return await _cached(GRADES_KEY, GRADES_SQL, grades_from_rows)
+
+
+async def fetch_climb_locations():
+    return await _cached(CLIMB_LOCATIONS_KEY, CLIMB_LOCATIONS_SQL, climb_locations_from_rows)
+
+
+# ---------- Profile ----------
+async def fetch_user_profile(user_id):
+    return user_profile_from_row(user_id, await _fetch(USER_PROFILE_SQL, (user_id,), one=True))
+
+
+# ---------- Buddies ----------
+async def list_buddies(uid):
+    try:
+        return buddies_from_rows(await _fetch(LIST_BUDDIES_SQL, (uid,))), 200
+    except Exception:
+        logger.exception("buddies list failed user_id=%s", uid)
+        return _err("db_error", "Could not fetch buddy groups.", 500)
+
+
+async def buddy_feed(uid):
+    try:
+        (sql, params), = buddy_feed_statements(uid)
+        return buddy_feed_from_rows(await _fetch(sql, params)), 200
+    except Exception:
+        logger.exception("buddy_feed failed user_id=%s", uid)
+        return _err("db_error", "Could not fetch buddy feed.", 500)
+
+
+# ---------- Sessions ----------
+async def commit_session_service(user_id: str, payload: dict):
+    """Same payload and responses as climb_service.commit_session_service."""
+    sess = payload.get("session") or {}
+    routes = payload.get("routes") or []
+
+    if not sess.get("started_at") or not sess.get("ended_at"):
+        return {"error": "Missing session start or end time"}, 400
+
+    try:
+        params = session_params(
+            user_id=user_id,
+            started_at=sess.get("started_at"),
+            ended_at=sess.get("ended_at"),
+            notes=sess.get("notes"),
+            location=sess.get("location"),
+        )
+        registry = grade_registry_for(await fetch_grades())
+        async with async_pool.connection() as conn, conn.transaction():
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await cur.execute(INSERT_SESSION_SQL, params)
+                session_id = str((await cur.fetchone())["session_id"])
+                route_rows, unknown_rows = session_route_rows(session_id, routes, registry)
+                if route_rows:
+                    await cur.executemany(INSERT_SESSION_ROUTE_SQL, route_rows)
+                if unknown_rows:
+                    await cur.executemany(INSERT_UNKNOWN_GRADE_SQL, unknown_rows)
+                for sql, stat_params in user_climb_stats_statements(user_id, [session_id]):
+                    await cur.execute(sql, stat_params)
+
+        logger.info(
+            "climb_session committed user_id=%s session_id=%s routes=%s location=%s",
+            user_id,
+            session_id,
+            len(routes),
+            sess.get("location") or "-",
+        )
+        return {"ok": True, "session_id": session_id}, 200
+
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    except Exception:
+        logger.exception("climb_session failed user_id=%s routes=%s", user_id, len(routes))
+        return {"error": "Something happened while trying to save the session."}, 500
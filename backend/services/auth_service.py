@@ -8,14 +8,19 @@ from psycopg.rows import dict_row
 from psycopg.errors import UniqueViolation
 from flask import session
 from utils.http import err
-from utils.security import hash_password, verify_password, login_user
-from utils.mail import MailDeliveryError, send_password_reset_email
+from utils.auth import remember_user_role
+from utils.security import PasswordHasherBusy, hash_password, needs_rehash, verify_password, login_user
 from services.user_profile_service import fetch_user_profile
+from services.job_service import JOB_PASSWORD_RESET_EMAIL, enqueue_job
 from utils.connect_db import pool
 
 logger = logging.getLogger("climbge-api")
 
 
+def _hasher_busy():
+    return err("server_busy", "Server is busy. Please try again in a moment.", 503)
+
+
 def signup_user(data: dict):
     username = (data.get("username") or "").strip()
     password = data.get("password") or ""
@@ -50,7 +55,11 @@ def signup_user(data: dict):
     home_gym   = (data.get("primary_gym") or data.get("home_gym") or "").strip() or None
     sex        = (data.get("sex") or "").strip() or None
 
-    pwd_hash = hash_password(password)
+    try:
+        pwd_hash = hash_password(password)
+    except PasswordHasherBusy:
+        logger.warning("signup rejected bcrypt_busy")
+        return _hasher_busy()
 
     try:
         with pool.connection() as conn, conn.transaction(), conn.cursor() as cur:
@@ -128,6 +137,26 @@ def _record_login_attempt(cur, username: str, user_id, success: bool, user_agent
     )
 
 
+def _rehash_password(user_id, old_hash: str, password: str) -> None:
+    try:
+        new_hash = hash_password(password)
+    except PasswordHasherBusy:
+        logger.info("login rehash skipped bcrypt_busy user_id=%s", user_id)
+        return
+    try:
+        with pool.connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                "UPDATE public.users SET password = %s WHERE user_id = %s AND password = %s",
+                (new_hash, user_id, old_hash),
+            )
+            updated = cur.rowcount
+    except Exception:
+        logger.exception("login rehash failed user_id=%s", user_id)
+        return
+    if updated:
+        logger.info("login password_rehashed user_id=%s", user_id)
+
+
 def login_with_password(username: str, password: str, user_agent: str | None = None):
     if not username or not password:
         return err("invalid_request", "Username and password are required."), 400
@@ -136,7 +165,7 @@ def login_with_password(username: str, password: str, user_agent: str | None = N
         with pool.connection() as conn, conn.transaction(), conn.cursor(row_factory=dict_row) as cur:
             cur.execute(
                 """
-                SELECT user_id, password
+                SELECT user_id, password, role
                 FROM public.users
                 WHERE username = %s
                 LIMIT 1
@@ -152,12 +181,22 @@ def login_with_password(username: str, password: str, user_agent: str | None = N
                 return err("invalid_credentials", "Invalid credentials.", 401)
 
             _record_login_attempt(cur, username, row["user_id"], True, user_agent)
-            cur.execute(
-                "UPDATE public.users SET last_login = now() WHERE user_id = %s",
-                (row["user_id"],),
-            )
+
+            cur.execute("UPDATE public.users SET last_login = now() WHERE user_id = %s", (row["user_id"],))
+
+        # Upgrade hashes made with an older work factor while we have the plaintext.
+        # bcrypt runs with no connection held; the UPDATE only applies if the
+        # password was not changed in the meantime.
+        if needs_rehash(row["password"]):
+            _rehash_password(row["user_id"], row["password"], password)
 
         profile = fetch_user_profile(row["user_id"])
+        # The profile may come from a replica; re-prime the role cache with the
+        # primary's value so a role change applies from the next login on.
+        remember_user_role(row["user_id"], row["role"])
+    except PasswordHasherBusy:
+        logger.warning("login rejected bcrypt_busy")
+        return _hasher_busy()
     except Exception:
         logger.exception("login failed db_error")
         return err("db_error", "Database error.", 500)
@@ -202,6 +241,11 @@ def request_password_reset(email: str, username: str):
     token_hash = hashlib.sha256(token.encode()).hexdigest()
     expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
 
+    frontend_url = os.getenv("FRONTEND_URL", "http://localhost:5173")
+    reset_link = f"{frontend_url}/reset-password?token={token}"
+
+    # The mail itself goes out from worker.py; queueing it in the same
+    # transaction means a stored token always has a pending email and vice versa.
     try:
         with pool.connection() as conn, conn.transaction(), conn.cursor() as cur:
             cur.execute(
@@ -219,21 +263,16 @@ def request_password_reset(email: str, username: str):
                 """,
                 (token_hash, row["user_id"], expires_at),
             )
+            job_id = enqueue_job(
+                cur,
+                JOB_PASSWORD_RESET_EMAIL,
+                {"to_email": row["email"], "reset_link": reset_link},
+            )
     except Exception:
         logger.error("password_reset: failed to store reset token", exc_info=True)
         return {"ok": True}, 200
 
-    frontend_url = os.getenv("FRONTEND_URL", "http://localhost:5173")
-    reset_link = f"{frontend_url}/reset-password?token={token}"
-
-    try:
-        send_password_reset_email(row["email"], reset_link)
-    except MailDeliveryError:
-        logger.exception("password_reset: failed to send reset email user_id=%s", row["user_id"])
-    except Exception:
-        logger.exception("password_reset: unexpected email failure user_id=%s", row["user_id"])
-    else:
-        logger.info("password_reset email_sent user_id=%s", row["user_id"])
+    logger.info("password_reset email_queued user_id=%s job_id=%s", row["user_id"], job_id)
 
     return {"ok": True}, 200
 
@@ -265,6 +304,9 @@ def reset_password_with_token(token: str, new_password: str):
                 "UPDATE public.users SET password = %s WHERE user_id = %s",
                 (pwd_hash, row["user_id"]),
             )
+    except PasswordHasherBusy:
+        logger.warning("password_reset rejected bcrypt_busy")
+        return _hasher_busy()
     except Exception:
         logger.exception("password_reset: failed to update password")
         return err("db_error", "Could not update password.", 500)
@@ -1,6 +1,8 @@
 import hashlib
 import logging
 import os
+import time
+import uuid
 from datetime import date as date_cls
 from datetime import time as time_cls
 from datetime import datetime, timezone
@@ -8,6 +10,7 @@ from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from psycopg.rows import dict_row
 from psycopg.errors import UniqueViolation
 from utils.connect_db import pool
+from utils.db_routing import connection, read_only
 from utils.http import err
 from utils.parse_timestamp import parse_ts
 
@@ -23,25 +26,24 @@ MAX_BUDDY_GROUPS_PER_USER = 5
 # climbs (the earliest ones). A user can still create as many plans as they like.
 MAX_FEED_PLANS_PER_BUDDY = 2
 
+# planned_timestamp is NOT NULL (migrations/005), so an upcoming plan is a
+# plain range on the (user_id, planned_timestamp) index. A plan still missing
+# it would never show as upcoming, so this code must only go live after
+# backfill_planned_timestamps.py and migration 005 have run (see 005).
+PLANNED_CLIMB_UPCOMING_SQL = """
+pc.planned_timestamp > NOW()
+"""
+
+# The instant of a plan saved before planned_timestamp existed: its date and
+# time (end of day when unset) in DEFAULT_PLANNED_CLIMB_TIMEZONE. Only used to
+# backfill those rows, see backfill_planned_timestamps().
 PLANNED_CLIMB_LEGACY_TIMESTAMP_SQL = """
 ((pc.planned_date::timestamp + COALESCE(pc.planned_time, TIME '23:59:59.999')) AT TIME ZONE %s)
 """
 
-PLANNED_CLIMB_UPCOMING_SQL = (
-    """
-(
-    (pc.planned_timestamp IS NOT NULL AND pc.planned_timestamp > NOW())
-    OR (
-        pc.planned_timestamp IS NULL
-        AND
-"""
-    + PLANNED_CLIMB_LEGACY_TIMESTAMP_SQL
-    + """
-        > NOW()
-    )
-)
-"""
-)
+PLANNED_CLIMB_BACKFILL_BATCH = 5000
+# Pause before retrying when every remaining legacy row is locked by a live write.
+PLANNED_CLIMB_BACKFILL_RETRY_SECONDS = 1.0
 
 
 # ---------- Authorization helpers ----------
@@ -161,41 +163,46 @@ def _remove_member(cur, buddy_id, target_uid):
 
 
 # ---------- Groups ----------
+LIST_BUDDIES_SQL = """
+    SELECT b.id,
+           b.name,
+           b.created_at,
+           me.user_role AS your_role,
+           (SELECT count(*) FROM public.buddy_members m WHERE m.buddy_id = b.id) AS member_count
+    FROM public.buddies b
+    JOIN public.buddy_members me ON me.buddy_id = b.id AND me.user_id = %s
+    ORDER BY b.created_at DESC
+    """
+
+
+@read_only
 def list_buddies(uid):
     """List groups the caller belongs to, with member counts and their role."""
     try:
-        with pool.connection() as conn, conn.cursor(row_factory=dict_row) as cur:
-            cur.execute(
-                """
-                SELECT b.id,
-                       b.name,
-                       b.created_at,
-                       me.user_role AS your_role,
-                       (SELECT count(*) FROM public.buddy_members m WHERE m.buddy_id = b.id) AS member_count
-                FROM public.buddies b
-                JOIN public.buddy_members me ON me.buddy_id = b.id AND me.user_id = %s
-                ORDER BY b.created_at DESC
-                """,
-                (uid,),
-            )
+        with connection() as conn, conn.cursor(row_factory=dict_row) as cur:
+            cur.execute(LIST_BUDDIES_SQL, (uid,))
             rows = cur.fetchall()
-        return {
-            "buddies": [
-                {
-                    "id": str(r["id"]),
-                    "name": r["name"],
-                    "created_at": r["created_at"].isoformat(),
-                    "member_count": r["member_count"],
-                    "your_role": r["your_role"],
-                }
-                for r in rows
-            ]
-        }, 200
+        return buddies_from_rows(rows), 200
     except Exception:
         logger.exception("buddies list failed user_id=%s", uid)
         return err("db_error", "Could not fetch buddy groups.", 500)
 
 
+def buddies_from_rows(rows):
+    return {
+        "buddies": [
+            {
+                "id": r["id"],
+                "name": r["name"],
+                "created_at": r["created_at"],
+                "member_count": r["member_count"],
+                "your_role": r["your_role"],
+            }
+            for r in rows
+        ]
+    }
+
+
 def create_buddy(uid, name):
     name = (name or "").strip()
     if not name:
@@ -232,9 +239,9 @@ def create_buddy(uid, name):
             )
         logger.info("buddy_created user_id=%s buddy_id=%s", uid, grp["id"])
         return {
-            "id": str(grp["id"]),
+            "id": grp["id"],
             "name": grp["name"],
-            "created_at": grp["created_at"].isoformat(),
+            "created_at": grp["created_at"],
             "member_count": 1,
             "your_role": "owner",
         }, 201
@@ -271,17 +278,17 @@ def get_buddy(uid, buddy_id):
             )
             members = cur.fetchall()
         return {
-            "id": str(grp["id"]),
+            "id": grp["id"],
             "name": grp["name"],
-            "created_at": grp["created_at"].isoformat(),
+            "created_at": grp["created_at"],
             "your_role": role,
             "members": [
                 {
-                    "user_id": str(m["user_id"]),
+                    "user_id": m["user_id"],
                     "username": m["username"],
                     "name": m["name"],
                     "role": m["user_role"],
-                    "joined_at": m["joined_at"].isoformat(),
+                    "joined_at": m["joined_at"],
                 }
                 for m in members
             ],
@@ -373,12 +380,12 @@ def list_my_invites(uid):
         return {
             "invites": [
                 {
-                    "id": str(r["id"]),
-                    "buddy_id": str(r["buddy_id"]),
+                    "id": r["id"],
+                    "buddy_id": r["buddy_id"],
                     "group_name": r["group_name"],
                     "invited_by_username": r["invited_by_username"],
                     "invited_by_name": r["invited_by_name"],
-                    "created_at": r["created_at"].isoformat(),
+                    "created_at": r["created_at"],
                 }
                 for r in rows
             ]
@@ -430,11 +437,11 @@ def invite_to_buddy(uid, buddy_id, username):
             inv["id"],
         )
         return {
-            "id": str(inv["id"]),
+            "id": inv["id"],
             "buddy_id": str(buddy_id),
             "invited_username": target["username"],
             "status": "pending",
-            "created_at": inv["created_at"].isoformat(),
+            "created_at": inv["created_at"],
         }, 201
     except Exception:
         logger.exception("buddy_invite failed user_id=%s buddy_id=%s", uid, buddy_id)
@@ -470,7 +477,7 @@ def accept_invite(uid, invite_id):
                 (invite_id,),
             )
         logger.info("buddy_invite_accepted user_id=%s invite_id=%s buddy_id=%s", uid, invite_id, inv["buddy_id"])
-        return {"ok": True, "buddy_id": str(inv["buddy_id"])}, 200
+        return {"ok": True, "buddy_id": inv["buddy_id"]}, 200
     except Exception:
         logger.exception("buddy_invite_accept failed user_id=%s invite_id=%s", uid, invite_id)
         return err("db_error", "Could not accept invite.", 500)
@@ -518,9 +525,9 @@ def list_planned_climbs(uid):
                 + PLANNED_CLIMB_UPCOMING_SQL
                 + """
                 GROUP BY pc.id
-                ORDER BY pc.planned_timestamp ASC NULLS LAST, pc.planned_date ASC, pc.planned_time ASC NULLS LAST
+                ORDER BY pc.planned_timestamp ASC
                 """,
-                (uid, DEFAULT_PLANNED_CLIMB_TIMEZONE),
+                (uid,),
             )
             rows = cur.fetchall()
         return {"plans": [_plan_dict(r) for r in rows]}, 200
@@ -553,6 +560,18 @@ def create_planned_climb(uid, payload):
     if parsed_timestamp <= datetime.now(timezone.utc):
         return err("invalid_input", "Plan time must be in the future.", 422)
 
+    if not share_all:
+        if not isinstance(buddy_ids, list):
+            return err("invalid_input", "buddy_ids must be a list.", 422)
+        # Parsed here so a malformed id is reported like any other invalid id;
+        # repeats are dropped (the group table is keyed on plan + group).
+        parsed_ids = {}
+        for bid in buddy_ids:
+            try:
+                parsed_ids.setdefault(uuid.UUID(str(bid)), str(bid))
+            except ValueError:
+                parsed_ids.setdefault(str(bid), str(bid))
+
     try:
         with pool.connection() as conn, conn.transaction(), conn.cursor(row_factory=dict_row) as cur:
             if share_all:
@@ -560,12 +579,22 @@ def create_planned_climb(uid, payload):
                     "SELECT buddy_id FROM public.buddy_members WHERE user_id = %s",
                     (uid,),
                 )
-                buddy_ids = [str(r["buddy_id"]) for r in cur.fetchall()]
+                buddy_ids = [r["buddy_id"] for r in cur.fetchall()]
             else:
-                buddy_ids = [str(b) for b in buddy_ids]
-                for bid in buddy_ids:
-                    if _require_member(cur, bid, uid) is None:
-                        return err("forbidden", "You can only share into groups you belong to.", 403)
+                buddy_ids = [bid for bid in parsed_ids if isinstance(bid, uuid.UUID)]
+                cur.execute(
+                    "SELECT buddy_id FROM public.buddy_members WHERE user_id = %s AND buddy_id = ANY(%s)",
+                    (uid, buddy_ids),
+                )
+                member_of = {r["buddy_id"] for r in cur.fetchall()}
+                invalid = [raw for bid, raw in parsed_ids.items() if bid not in member_of]
+                if invalid:
+                    return err(
+                        "forbidden",
+                        "You can only share into groups you belong to.",
+                        403,
+                        invalid_buddy_ids=invalid,
+                    )
 
             cur.execute(
                 """
@@ -577,10 +606,13 @@ def create_planned_climb(uid, payload):
                 (uid, gym, city, country, parsed_date, parsed_time, parsed_timestamp),
             )
             plan = cur.fetchone()
-            for bid in buddy_ids:
+            if buddy_ids:
                 cur.execute(
-                    "INSERT INTO public.planned_climb_groups (planned_climb_id, buddy_id) VALUES (%s, %s)",
-                    (plan["id"], bid),
+                    """
+                    INSERT INTO public.planned_climb_groups (planned_climb_id, buddy_id)
+                    SELECT %s, unnest(%s::uuid[])
+                    """,
+                    (plan["id"], buddy_ids),
                 )
         logger.info(
             "planned_climb_created user_id=%s plan_id=%s shared_groups=%s",
@@ -595,6 +627,54 @@ def create_planned_climb(uid, payload):
         return err("db_error", "Could not save planned climb.", 500)
 
 
+def backfill_planned_timestamps(batch_size: int = PLANNED_CLIMB_BACKFILL_BATCH) -> int:
+    """
+    Fill planned_timestamp on plans saved before it existed, from their date
+    and time in DEFAULT_PLANNED_CLIMB_TIMEZONE. Runs in batches of
+    batch_size rows, each in its own transaction, so live plan writes are
+    never blocked for long. Returns the number of rows updated.
+
+    SKIP LOCKED can return short (or empty) batches while rows are still
+    missing, so it only stops once no row with a NULL planned_timestamp is left.
+    """
+    total = 0
+    while True:
+        with pool.connection() as conn, conn.transaction(), conn.cursor() as cur:
+            cur.execute(
+                """
+                WITH batch AS MATERIALIZED (
+                    SELECT id FROM public.planned_climbs
+                    WHERE planned_timestamp IS NULL
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                UPDATE public.planned_climbs pc
+                SET planned_timestamp =
+                """
+                + PLANNED_CLIMB_LEGACY_TIMESTAMP_SQL
+                + """
+                FROM batch
+                WHERE pc.id = batch.id
+                """,
+                (batch_size, DEFAULT_PLANNED_CLIMB_TIMEZONE),
+            )
+            updated = cur.rowcount
+        total += updated
+        logger.info(
+            "planned_timestamp backfill batch=%s total=%s timezone=%s",
+            updated,
+            total,
+            DEFAULT_PLANNED_CLIMB_TIMEZONE,
+        )
+        if updated:
+            continue
+        with pool.connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT EXISTS (SELECT 1 FROM public.planned_climbs WHERE planned_timestamp IS NULL)")
+            if not cur.fetchone()[0]:
+                return total
+        time.sleep(PLANNED_CLIMB_BACKFILL_RETRY_SECONDS)
+
+
 def cancel_planned_climb(uid, plan_id):
     try:
         with pool.connection() as conn, conn.transaction(), conn.cursor(row_factory=dict_row) as cur:
@@ -611,101 +691,123 @@ def cancel_planned_climb(uid, plan_id):
         return err("db_error", "Could not cancel planned climb.", 500)
 
 
+BUDDY_FEED_SQL = (
+    """
+    WITH my_groups AS (
+        SELECT buddy_id FROM public.buddy_members WHERE user_id = %s
+    ),
+    buddies AS (
+        SELECT DISTINCT other.user_id
+        FROM public.buddy_members other
+        JOIN my_groups g ON g.buddy_id = other.buddy_id
+        WHERE other.user_id <> %s
+    ),
+    plans AS (
+        SELECT *
+        FROM (
+            SELECT pc.id, pc.user_id, pc.gym, pc.city, pc.country,
+                   pc.planned_date, pc.planned_time, pc.planned_timestamp,
+                   row_number() OVER (
+                       PARTITION BY pc.user_id
+                       ORDER BY pc.planned_timestamp ASC
+                   ) AS rn
+            FROM public.planned_climbs pc
+            WHERE pc.user_id IN (SELECT user_id FROM buddies)
+              AND EXISTS (
+                  SELECT 1
+                  FROM public.planned_climb_groups pcg
+                  JOIN my_groups g ON g.buddy_id = pcg.buddy_id
+                  WHERE pcg.planned_climb_id = pc.id
+              )
+              AND
+    """
+    + PLANNED_CLIMB_UPCOMING_SQL
+    + """
+        ) ranked
+        WHERE rn <= %s
+    )
+    SELECT p.user_id, p.username, p.name,
+           lcs.location AS last_location, lcs.climb_date AS last_climb_date,
+           plans.id, plans.gym, plans.city, plans.country,
+           plans.planned_date, plans.planned_time, plans.planned_timestamp
+    FROM buddies b
+    JOIN public.user_profile p ON p.user_id = b.user_id
+    LEFT JOIN public.user_last_climb lcs ON lcs.user_id = b.user_id
+    LEFT JOIN plans ON plans.user_id = b.user_id
+    ORDER BY p.name, p.user_id, plans.rn
+    """
+)
+
+
+def buddy_feed_statements(uid):
+    """The (sql, params) pairs buddy_feed runs, in the order buddy_feed_from_rows expects."""
+    return [
+        (BUDDY_FEED_SQL, (uid, uid, MAX_FEED_PLANS_PER_BUDDY)),
+    ]
+
+
+@read_only
 def buddy_feed(uid):
     """
     For each buddy (a user sharing at least one group with the caller), return
     their last climb (auto-visible) and any upcoming planned climbs shared into
-    a group the caller also belongs to.
+    a group the caller also belongs to. The per-buddy cap on plans is applied
+    in SQL, so only rows that are shown leave the database.
     """
     try:
-        with pool.connection() as conn, conn.transaction(), conn.cursor(row_factory=dict_row) as cur:
-            cur.execute(
-                """
-                SELECT DISTINCT p.user_id, p.username, p.name
-                FROM public.buddy_members me
-                JOIN public.buddy_members other ON other.buddy_id = me.buddy_id
-                JOIN public.user_profile p ON p.user_id = other.user_id
-                WHERE me.user_id = %s AND other.user_id <> %s
-                ORDER BY p.name
-                """,
-                (uid, uid),
-            )
-            buddies = cur.fetchall()
-
-            cur.execute(
-                """
-                SELECT lcs.user_id, lcs.location, lcs.climb_date
-                FROM public.last_climb_session lcs
-                WHERE lcs.user_id IN (
-                    SELECT other.user_id
-                    FROM public.buddy_members me
-                    JOIN public.buddy_members other ON other.buddy_id = me.buddy_id
-                    WHERE me.user_id = %s AND other.user_id <> %s
-                )
-                """,
-                (uid, uid),
-            )
-            last_by_user = {str(r["user_id"]): r for r in cur.fetchall()}
-
-            cur.execute(
-                """
-                SELECT DISTINCT pc.id, pc.user_id, pc.gym, pc.city, pc.country,
-                       pc.planned_date, pc.planned_time, pc.planned_timestamp
-                FROM public.planned_climbs pc
-                JOIN public.planned_climb_groups pcg ON pcg.planned_climb_id = pc.id
-                JOIN public.buddy_members me ON me.buddy_id = pcg.buddy_id AND me.user_id = %s
-                WHERE pc.user_id <> %s AND
-                """
-                + PLANNED_CLIMB_UPCOMING_SQL
-                + """
-                ORDER BY pc.planned_timestamp ASC NULLS LAST, pc.planned_date ASC, pc.planned_time ASC NULLS LAST
-                """,
-                (uid, uid, DEFAULT_PLANNED_CLIMB_TIMEZONE),
-            )
-            # Rows arrive ordered earliest-first, so keeping the first few per
-            # user yields each buddy's soonest upcoming plans.
-            plans_by_user = {}
-            for r in cur.fetchall():
-                bucket = plans_by_user.setdefault(str(r["user_id"]), [])
-                if len(bucket) < MAX_FEED_PLANS_PER_BUDDY:
-                    bucket.append(r)
-
-        feed = []
-        for b in buddies:
-            buid = str(b["user_id"])
-            last = last_by_user.get(buid)
-            feed.append(
-                {
-                    "user_id": buid,
-                    "username": b["username"],
-                    "name": b["name"],
-                    "last_climb": (
-                        {
-                            "location": last["location"],
-                            "climb_date": last["climb_date"].isoformat(),
-                        }
-                        if last
-                        else None
-                    ),
-                    "planned_climbs": [_plan_dict(p, include_groups=False) for p in plans_by_user.get(buid, [])],
-                }
-            )
-        return {"buddies": feed}, 200
+        with connection() as conn, conn.transaction(), conn.cursor(row_factory=dict_row) as cur:
+            (sql, params), = buddy_feed_statements(uid)
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+        return buddy_feed_from_rows(rows), 200
     except Exception:
         logger.exception("buddy_feed failed user_id=%s", uid)
         return err("db_error", "Could not fetch buddy feed.", 500)
 
 
+def buddy_feed_from_rows(rows):
+    """
+    Fold BUDDY_FEED_SQL rows (one per buddy and upcoming plan, at most
+    MAX_FEED_PLANS_PER_BUDDY plans each, buddies without plans get one row
+    with NULL plan columns) into the feed document.
+    """
+    feed = []
+    by_user = {}
+    for r in rows:
+        buid = r["user_id"]
+        entry = by_user.get(buid)
+        if entry is None:
+            entry = {
+                "user_id": buid,
+                "username": r["username"],
+                "name": r["name"],
+                "last_climb": (
+                    {
+                        "location": r["last_location"],
+                        "climb_date": r["last_climb_date"],
+                    }
+                    if r["last_climb_date"] is not None
+                    else None
+                ),
+                "planned_climbs": [],
+            }
+            by_user[buid] = entry
+            feed.append(entry)
+        if r["id"] is not None:
+            entry["planned_climbs"].append(_plan_dict(r, include_groups=False))
+    return {"buddies": feed}
+
+
 def _plan_dict(r, include_groups=True):
     out = {
-        "id": str(r["id"]),
+        "id": r["id"],
         "gym": r["gym"],
         "city": r.get("city"),
         "country": r.get("country"),
-        "planned_date": r["planned_date"].isoformat() if hasattr(r["planned_date"], "isoformat") else r["planned_date"],
+        "planned_date": r["planned_date"],
         "planned_time": r["planned_time"].strftime("%H:%M") if r.get("planned_time") else None,
-        "planned_timestamp": r["planned_timestamp"].isoformat() if r.get("planned_timestamp") else None,
+        "planned_timestamp": r.get("planned_timestamp"),
     }
     if include_groups:
-        out["buddy_ids"] = [str(b) for b in (r.get("buddy_ids") or [])]
+        out["buddy_ids"] = r.get("buddy_ids") or []
     return out
@@ -1,8 +1,10 @@
 from typing import Any, Dict, List, Optional
 import logging
 from psycopg.rows import dict_row
+from utils.cache import reference_cache, GRADES_KEY, CLIMB_LOCATIONS_KEY
 from utils.connect_db import pool
 from utils.parse_timestamp import parse_ts
+from services.stats_service import refresh_user_climb_stats
 from collections import defaultdict
 
 logger = logging.getLogger("climbge-api")
@@ -13,7 +15,7 @@ UNKNOWN_GRADE_SYSTEM_ID = 999
 
 def fetch_grades() -> List[Dict[str, Any]]:
     """
-    Fetch grade systems.
+    Fetch grade systems (served from the reference cache when warm).
 
     Returns JSON-friendly list:
     [
@@ -24,17 +26,27 @@ def fetch_grades() -> List[Dict[str, Any]]:
       }
     ]
     """
+    return reference_cache.get_or_load(GRADES_KEY, _load_grades)
+
+
+GRADES_SQL = """
+    SELECT grade_id, grade_system, grades
+    FROM grade_systems
+    WHERE grade_id != 999
+    ORDER BY grade_id
+    """
+
+
+# The reference-cache loaders read from the primary: an approval invalidates
+# these keys right after it commits, and a refill from a lagging replica would
+# put the old rows back for REFERENCE_CACHE_TTL.
+def _load_grades() -> List[Dict[str, Any]]:
     with pool.connection() as conn, conn.cursor(row_factory=dict_row) as cur:
-        cur.execute(
-            """
-            SELECT grade_id, grade_system, grades
-            FROM grade_systems
-            WHERE grade_id != 999
-            ORDER BY grade_id
-            """
-        )
-        rows = cur.fetchall()
+        cur.execute(GRADES_SQL)
+        return grades_from_rows(cur.fetchall())
 
+
+def grades_from_rows(rows) -> List[Dict[str, Any]]:
     return [
         {
             "gradeId": r["grade_id"],
@@ -45,20 +57,131 @@ def fetch_grades() -> List[Dict[str, Any]]:
     ]
 
 
+def grade_label_key(label: str) -> str:
+    """
+    The key grade labels are matched on: Python's side of GRADE_LABEL_KEY_SQL
+    (lower(btrim(...)), which trims spaces only), so ranks written on insert
+    and ranks recomputed in SQL agree.
+    """
+    return label.strip(" ").lower()
+
+
+GRADE_LABEL_KEY_SQL = "lower(btrim({}))"
+
+# Recompute grade_rank for every route of the given grade systems, from their
+# current `grades` arrays; labels no longer in the array lose their rank.
+# migrations/006 ran the same match once over all existing routes.
+REFRESH_GRADE_RANKS_SQL = f"""
+    WITH ranks AS (
+        SELECT gs.grade_id, {GRADE_LABEL_KEY_SQL.format("u.label")} AS label_key, min(u.ordinal) - 1 AS grade_rank
+        FROM public.grade_systems gs
+        CROSS JOIN LATERAL unnest(gs.grades) WITH ORDINALITY AS u(label, ordinal)
+        WHERE gs.grade_id = ANY(%(grade_ids)s) AND gs.grade_id <> {UNKNOWN_GRADE_SYSTEM_ID}
+        GROUP BY gs.grade_id, label_key
+    )
+    UPDATE public.session_routes r
+    SET grade_rank = (
+        SELECT k.grade_rank FROM ranks k
+        WHERE k.grade_id = r.grade_system AND k.label_key = {GRADE_LABEL_KEY_SQL.format("r.grade_label")}
+    )
+    WHERE r.grade_system = ANY(%(grade_ids)s) AND r.grade_system <> {UNKNOWN_GRADE_SYSTEM_ID}
+    """
+
+
+def refresh_grade_ranks(cur, grade_ids) -> int:
+    """Re-rank stored routes after the grades of `grade_ids` changed. Returns the rows touched."""
+    cur.execute(REFRESH_GRADE_RANKS_SQL, {"grade_ids": list(grade_ids)})
+    return cur.rowcount
+
+
+class GradeRegistry:
+    """
+    Ranks of every grade label, from the grade systems fetch_grades returns.
+
+    rank() is the label's position in its system's `grades` array (0 =
+    easiest), so grades within a system compare as integers. difficulty()
+    scales that to 0.0-1.0 over the system's range, a rough cross-system
+    measure. Labels match on grade_label_key(); unknown labels and the
+    "Other" system have no rank (None).
+    """
+
+    def __init__(self, grade_systems: List[Dict[str, Any]]):
+        self._ranks = {}  # (grade_id, grade_label_key) -> (ordinal, difficulty)
+        self.system_ids = frozenset(gs["gradeId"] for gs in grade_systems) | {UNKNOWN_GRADE_SYSTEM_ID}
+        for gs in grade_systems:
+            grades = gs["grades"] or []
+            top = max(len(grades) - 1, 1)
+            for ordinal, label in enumerate(grades):
+                self._ranks.setdefault((gs["gradeId"], grade_label_key(label)), (ordinal, ordinal / top))
+
+    def __len__(self) -> int:
+        return len(self._ranks)
+
+    def _lookup(self, grade_id, label):
+        if not isinstance(label, str):
+            return None
+        return self._ranks.get((grade_id, grade_label_key(label)))
+
+    def rank(self, grade_id, label) -> Optional[int]:
+        entry = self._lookup(grade_id, label)
+        return entry[0] if entry else None
+
+    def difficulty(self, grade_id, label) -> Optional[float]:
+        entry = self._lookup(grade_id, label)
+        return entry[1] if entry else None
+
+
+# (grade systems list it was built from, registry). The reference cache hands
+# out the same list until it reloads, so an identity check tells when to rebuild.
+_grade_registry = (None, None)
+
+
+def grade_registry_for(grade_systems: List[Dict[str, Any]]) -> GradeRegistry:
+    global _grade_registry
+    source, registry = _grade_registry
+    if source is not grade_systems:
+        registry = GradeRegistry(grade_systems)
+        _grade_registry = (grade_systems, registry)
+    return registry
+
+
+def grade_registry() -> GradeRegistry:
+    """Registry for the current grade systems; loads them on a cold cache."""
+    return grade_registry_for(fetch_grades())
+
+
 # ---------- Sessions ----------
 
-def insert_session(
-    cur,
+INSERT_SESSION_SQL = """
+    INSERT INTO climb_sessions (user_id, started_at, ended_at, notes, location)
+    VALUES (%s, %s, %s, %s, %s)
+    RETURNING session_id
+    """
+
+INSERT_SESSION_ROUTE_SQL = """
+    INSERT INTO session_routes (
+        session_id, grade_system, grade_label, attempts, sent, sent_at, description, grade_rank
+    )
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """
+
+INSERT_UNKNOWN_GRADE_SQL = """
+    INSERT INTO unknown_grade_systems (grade_id, grade_system, grades)
+    VALUES (%s, %s, %s)
+    """
+
+
+def session_params(
     *,
     user_id: str,
     started_at: str,
     ended_at: str,
     notes: Optional[str],
     location: Optional[str]
-) -> str:
+) -> tuple:
     """
-    Insert a climb_sessions row and return session_id (uuid as string).
-    started_at and ended_at are FE-provided ISO strings and are parsed here.
+    INSERT_SESSION_SQL parameters. started_at and ended_at are FE-provided ISO
+    strings and are parsed here.
     """
     started_dt = parse_ts(started_at)
     ended_dt = parse_ts(ended_at)
@@ -66,21 +189,33 @@ def insert_session(
     if ended_dt < started_dt:
         raise ValueError("ended_at is before started_at")
 
+    return (user_id, started_dt, ended_dt, notes, location)
+
+
+def insert_session(
+    cur,
+    *,
+    user_id: str,
+    started_at: str,
+    ended_at: str,
+    notes: Optional[str],
+    location: Optional[str]
+) -> str:
+    """
+    Insert a climb_sessions row and return session_id (uuid as string).
+    """
     cur.execute(
-        """
-        INSERT INTO climb_sessions (user_id, started_at, ended_at, notes, location)
-        VALUES (%s, %s, %s, %s, %s)
-        RETURNING session_id
-        """,
-        (user_id, started_dt, ended_dt, notes, location),
+        INSERT_SESSION_SQL,
+        session_params(user_id=user_id, started_at=started_at, ended_at=ended_at, notes=notes, location=location),
     )
     row = cur.fetchone()
     return str(row["session_id"])
 
 
-def insert_session_routes(cur, *, session_id: str, routes: List[Dict[str, Any]]) -> None:
+def session_route_rows(session_id: str, routes: List[Dict[str, Any]], registry: Optional[GradeRegistry] = None):
     """
-    Insert route rows for a session.
+    Validate routes into (INSERT_SESSION_ROUTE_SQL rows, INSERT_UNKNOWN_GRADE_SQL rows).
+    grade_rank is looked up in `registry` (None without one).
 
     Each route dict must contain:
       - grade_system: int
@@ -90,21 +225,8 @@ def insert_session_routes(cur, *, session_id: str, routes: List[Dict[str, Any]])
       - sent: bool
       - sent_at: datetime (ISO string)
     """
-    if not routes:
-        return
-
-    sql_session_routes = """
-        INSERT INTO session_routes (
-            session_id, grade_system, grade_label, attempts, sent, sent_at, description
-        )
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
-    """
-
-    sql_unknown = """
-        INSERT INTO unknown_grade_systems (grade_id, grade_system, grades)
-        VALUES (%s, %s, %s)
-    """
-
+    route_rows = []
+    unknown_rows = []
     for r in routes:
         gs_id = r.get("grade_system", 999)
 
@@ -119,19 +241,36 @@ def insert_session_routes(cur, *, session_id: str, routes: List[Dict[str, Any]])
         sent_dt = parse_ts(sent_raw) if sent_raw else None
         description = r.get('description')
 
+        grade_rank = registry.rank(gs_id, grade_label) if registry is not None else None
+
         # (1) Always insert into session_routes
-        cur.execute(
-            sql_session_routes,
-            (session_id, gs_id, grade_label, attempts, sent, sent_dt, description),
-        )
+        route_rows.append((session_id, gs_id, grade_label, attempts, sent, sent_dt, description, grade_rank))
 
         # (2) If “Other”, also log to unknown_grade_systems
         if gs_id == UNKNOWN_GRADE_SYSTEM_ID:
             unknown_label = (r.get("grade_system_label") or "Other").strip()
-            cur.execute(
-                sql_unknown,
-                (UNKNOWN_GRADE_SYSTEM_ID, unknown_label, grade_label),
-            )
+            unknown_rows.append((UNKNOWN_GRADE_SYSTEM_ID, unknown_label, grade_label))
+
+    return route_rows, unknown_rows
+
+
+def insert_session_routes(
+    cur, *, session_id: str, routes: List[Dict[str, Any]], registry: Optional[GradeRegistry] = None
+) -> None:
+    """
+    Insert route rows for a session (see session_route_rows for the format).
+
+    All routes are validated first and then written with executemany, which
+    psycopg pipelines, so the round trips don't grow with the route count.
+    """
+    if not routes:
+        return
+
+    route_rows, unknown_rows = session_route_rows(session_id, routes, registry)
+    if route_rows:
+        cur.executemany(INSERT_SESSION_ROUTE_SQL, route_rows)
+    if unknown_rows:
+        cur.executemany(INSERT_UNKNOWN_GRADE_SQL, unknown_rows)
 
 
 def commit_session_service(user_id: str, payload: dict):
@@ -171,6 +310,8 @@ def commit_session_service(user_id: str, payload: dict):
         return {"error": "Missing session start or end time"}, 400
 
     try:
+        # Before the transaction, so a cold grade cache never needs a second connection.
+        registry = grade_registry()
         with pool.connection() as conn, conn.transaction():
             with conn.cursor(row_factory=dict_row) as cur:
                 session_id = insert_session(
@@ -181,7 +322,8 @@ def commit_session_service(user_id: str, payload: dict):
                     notes=sess_notes,
                     location=sess_location,
                 )
-                insert_session_routes(cur, session_id=session_id, routes=routes)
+                insert_session_routes(cur, session_id=session_id, routes=routes, registry=registry)
+                refresh_user_climb_stats(cur, user_id, [session_id])
 
         logger.info(
             "climb_session committed user_id=%s session_id=%s routes=%s location=%s",
@@ -203,7 +345,7 @@ def commit_session_service(user_id: str, payload: dict):
 # --------- Climb Locations ---------
 def fetch_climb_locations() -> List[Dict[str, Any]]:
     """
-    Fetch climb locations.
+    Fetch climb locations (served from the reference cache when warm).
 
     Returns JSON-friendly list:
     [
@@ -215,17 +357,24 @@ def fetch_climb_locations() -> List[Dict[str, Any]]:
       }
     ]
     """
+    return reference_cache.get_or_load(CLIMB_LOCATIONS_KEY, _load_climb_locations)
+
+
+CLIMB_LOCATIONS_SQL = """
+    select country, location, array_agg(gym_name order by gym_chain asc, gym_name asc) as gyms
+    from climbing_locations
+    where status = 'active'
+    group by country, location
+    """
+
+
+def _load_climb_locations() -> List[Dict[str, Any]]:
     with pool.connection() as conn, conn.cursor(row_factory=dict_row) as cur:
-        cur.execute(
-            """
-            select country, location, array_agg(gym_name order by gym_chain asc, gym_name asc) as gyms
-            from climbing_locations
-            where status = 'active'
-            group by country, location
-            """
-        )
-        rows = cur.fetchall()
+        cur.execute(CLIMB_LOCATIONS_SQL)
+        return climb_locations_from_rows(cur.fetchall())
+
 
+def climb_locations_from_rows(rows) -> List[Dict[str, Any]]:
     grouped = defaultdict(dict)
 
     for row in rows:
@@ -0,0 +1,123 @@
+import logging
+from psycopg.rows import dict_row
+from utils.cache import reference_cache, NEWS_KEY
+from utils.db_routing import connection, read_only
+from services.user_profile_service import USER_PROFILE_SQL, user_profile_from_row
+from services.history_service import (
+    LAST_CLIMB_SQL,
+    WEEKLY_STATS_SQL,
+    last_climb_from_row,
+    weekly_stats_from_row,
+)
+from services.news_service import NEWS_SQL
+from services.stats_service import CLIMB_STATS_TIMEZONE
+from services.buddy_service import buddy_feed_statements, buddy_feed_from_rows
+
+logger = logging.getLogger("climbge-api")
+
+_SECTION_ERRORS = {
+    "me": "Could not fetch profile.",
+    "last_climb": "Could not fetch last climb data!",
+    "weekly_summary": "Could not fetch weekly climb statistics!",
+    "news": "Could not fetch news post!",
+    "buddy_feed": "Could not fetch buddy feed.",
+}
+
+
+def _first(rows):
+    return rows[0] if rows else None
+
+
+def _me(uid, rows):
+    profile = user_profile_from_row(uid, _first(rows))
+    if profile is None:
+        return {"authenticated": False}
+    return {"authenticated": True, "profile": profile}
+
+
+def _cache_news(rows):
+    reference_cache.set(NEWS_KEY, rows)
+    return {"news": rows}
+
+
+def _sections(uid):
+    """
+    (name, [(sql, params), ...], shape) for every dashboard section. `shape`
+    receives one fetchall() list per statement, in order.
+    """
+    sections = [
+        ("me", [(USER_PROFILE_SQL, (uid,))], lambda r: _me(uid, r[0])),
+        ("last_climb", [(LAST_CLIMB_SQL, (uid,))], lambda r: last_climb_from_row(_first(r[0]))),
+        ("weekly_summary", [(WEEKLY_STATS_SQL, (uid, CLIMB_STATS_TIMEZONE))], lambda r: weekly_stats_from_row(_first(r[0]))),
+    ]
+
+    cached_news = reference_cache.get(NEWS_KEY)
+    if cached_news is not None:
+        sections.append(("news", [], lambda r: {"news": cached_news}))
+    else:
+        sections.append(("news", [(NEWS_SQL, None)], lambda r: _cache_news(r[0])))
+
+    sections.append(("buddy_feed", buddy_feed_statements(uid), lambda r: buddy_feed_from_rows(r[0])))
+    return sections
+
+
+def _run_pipelined(conn, sections):
+    """Send every statement in one pipeline (one round trip) and shape the results."""
+    out = {}
+    with conn.pipeline():
+        queued = []
+        for name, statements, shape in sections:
+            cursors = []
+            for sql, params in statements:
+                cur = conn.cursor(row_factory=dict_row)
+                cur.execute(sql, params)
+                cursors.append(cur)
+            queued.append((name, cursors, shape))
+        for name, cursors, shape in queued:
+            out[name] = shape([cur.fetchall() for cur in cursors])
+    return out
+
+
+def _run_one(conn, statements, shape):
+    with conn.cursor(row_factory=dict_row) as cur:
+        results = []
+        for sql, params in statements:
+            cur.execute(sql, params)
+            results.append(cur.fetchall())
+    return shape(results)
+
+
+@read_only
+def fetch_dashboard(uid):
+    """
+    Everything the home screen needs (/me, /last-climb, /weekly-summary, /news,
+    /buddies/feed) in one document, read over a single connection.
+
+    All queries go out in one pipeline. A failing statement aborts the rest of
+    a pipeline, so if anything fails the sections are re-run one by one and
+    only the broken ones are reported under "errors" (their value is null).
+    """
+    sections = _sections(uid)
+    payload = {}
+    errors = {}
+    try:
+        with connection() as conn:
+            try:
+                payload = _run_pipelined(conn, sections)
+            except Exception:
+                logger.warning("dashboard pipeline failed, retrying per section user_id=%s", uid, exc_info=True)
+                for name, statements, shape in sections:
+                    try:
+                        payload[name] = _run_one(conn, statements, shape)
+                    except Exception:
+                        logger.exception("dashboard section failed user_id=%s section=%s", uid, name)
+                        payload[name] = None
+                        errors[name] = {"code": "db_error", "message": _SECTION_ERRORS[name]}
+    except Exception:
+        logger.exception("dashboard failed user_id=%s", uid)
+        for name, _, _ in sections:
+            payload[name] = None
+            errors[name] = {"code": "db_error", "message": _SECTION_ERRORS[name]}
+
+    payload["errors"] = errors
+    return payload, 200
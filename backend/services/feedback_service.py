@@ -1,8 +1,16 @@
+import base64
+import binascii
 import logging
+import os
+import uuid
+import psycopg
+from psycopg import pq
 from psycopg.rows import dict_row
 from psycopg.errors import UniqueViolation
 from utils.http import err
+from utils.cache import reference_cache, GRADES_KEY, CLIMB_LOCATIONS_KEY
 from utils.connect_db import pool
+from services.climb_service import refresh_grade_ranks
 from string import capwords
 
 logger = logging.getLogger("climbge-api")
@@ -120,36 +128,226 @@ def submit_new_grade_system(user_id: str, payload: dict):
         return err("db_error", "Database error.", 500)
 
 
-def get_approval_queue():
-    """Fetch the approval queue for pending / rejected grade systems and climb locations"""
+APPROVAL_QUEUE_DEFAULT_LIMIT = 50
+APPROVAL_QUEUE_MAX_LIMIT = 200
+APPROVAL_QUEUE_TYPES = ('grade', 'location')
+APPROVAL_QUEUE_STATUSES = ('pending', 'rejected')
+
+# The views define what is in the queue; the join to the base table adds the
+# columns the filters need. Both are keyed on the table's primary key, which
+# is also the page order.
+_GRADE_QUEUE_SQL = """
+    SELECT v.grade_id, v.grade_system, v.grades, v.climb_type, g.status, g.submitted_by
+    FROM vw_pending_rejected_grade_system v
+    JOIN grade_systems g ON g.grade_id = v.grade_id
+    WHERE (%(status)s::text IS NULL OR g.status = %(status)s)
+      AND (%(submitter)s::uuid IS NULL OR g.submitted_by = %(submitter)s)
+      AND (%(climb_type)s::text IS NULL OR lower(g.climb_type) = lower(%(climb_type)s))
+      AND (%(after)s::int IS NULL OR v.grade_id > %(after)s)
+    ORDER BY v.grade_id
+    LIMIT %(limit)s
+    """
+
+_LOCATION_QUEUE_SQL = """
+    SELECT v.id, v.gym_name, v.gym_chain, v.location, v.country, l.status, l.submitted_by
+    FROM vw_pending_rejected_gym v
+    JOIN climbing_locations l ON l.id = v.id
+    WHERE (%(status)s::text IS NULL OR l.status = %(status)s)
+      AND (%(submitter)s::uuid IS NULL OR l.submitted_by = %(submitter)s)
+      AND (%(country)s::text IS NULL OR lower(l.country) = lower(%(country)s))
+      AND (%(after)s::int IS NULL OR v.id > %(after)s)
+    ORDER BY v.id
+    LIMIT %(limit)s
+    """
+
+# Unfiltered queue sizes for the approver badge.
+_APPROVAL_QUEUE_COUNTS_SQL = """
+    SELECT (SELECT count(*) FROM vw_pending_rejected_grade_system) AS grade,
+           (SELECT count(*) FROM vw_pending_rejected_gym) AS location
+    """
+
+
+def _encode_queue_cursor(item_id: int) -> str:
+    return base64.urlsafe_b64encode(str(item_id).encode()).decode().rstrip("=")
+
+
+# Queue ids are Postgres integers; anything outside that range is not a cursor
+# we issued, and would fail the %(after)s::int cast with a 500.
+_QUEUE_CURSOR_MAX = 2**31 - 1
+
+
+def _decode_queue_cursor(cursor: str) -> int:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    item_id = int(base64.urlsafe_b64decode(padded.encode()).decode())
+    if not 0 <= item_id <= _QUEUE_CURSOR_MAX:
+        raise ValueError("cursor out of range")
+    return item_id
+
+
+def get_approval_queue(
+    *,
+    item_type=None,
+    limit=None,
+    grade_cursor=None,
+    location_cursor=None,
+    status=None,
+    country=None,
+    submitter=None,
+    climb_type=None,
+):
+    """
+    Fetch one page of the approval queue for pending / rejected grade systems
+    and climb locations, oldest first, plus the total size of each queue.
+
+    `item_type` ("grade" | "location") limits the response to one queue.
+    `status` and `submitter` apply to both queues. `climb_type` only exists on
+    grade systems and `country` only on locations, so either one limits the
+    response to that queue. Pass next_cursor["grade"] / next_cursor["location"]
+    back as `grade_cursor` / `location_cursor` for the following page; a None
+    cursor means that queue has no more rows.
+    """
+    if limit in (None, ""):
+        limit = APPROVAL_QUEUE_DEFAULT_LIMIT
+    else:
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            return err("invalid_input", "limit must be an integer.", 422)
+        if limit < 1:
+            return err("invalid_input", "limit must be at least 1.", 422)
+        limit = min(limit, APPROVAL_QUEUE_MAX_LIMIT)
+
+    if item_type and item_type not in APPROVAL_QUEUE_TYPES:
+        return err("invalid_input", "type must be grade or location.", 422)
+    if status and status not in APPROVAL_QUEUE_STATUSES:
+        return err("invalid_input", "status must be pending or rejected.", 422)
+    if submitter:
+        try:
+            submitter = str(uuid.UUID(submitter))
+        except ValueError:
+            return err("invalid_input", "submitter must be a user id.", 422)
+
+    after = {}
+    for name, cursor in (("grade", grade_cursor), ("location", location_cursor)):
+        try:
+            after[name] = _decode_queue_cursor(cursor) if cursor else None
+        except (ValueError, UnicodeDecodeError, binascii.Error):
+            return err("invalid_input", "Invalid cursor.", 422)
+
+    wanted = set(APPROVAL_QUEUE_TYPES)
+    if item_type:
+        wanted &= {item_type}
+    if climb_type:
+        wanted &= {'grade'}
+    if country:
+        wanted &= {'location'}
+
+    filters = {
+        "status": status or None,
+        "submitter": submitter or None,
+        "climb_type": climb_type or None,
+        "country": country or None,
+        "limit": limit + 1,
+    }
+    queues = {"grade": [], "location": []}
+    next_cursor = {"grade": None, "location": None}
     try:
         with pool.connection() as conn, conn.transaction(), conn.cursor(row_factory=dict_row) as cur:
-            cur.execute(
-                """
-                SELECT grade_id, grade_system, grades, climb_type
-                FROM vw_pending_rejected_grade_system
-                """
-            )
-            grade_queue = cur.fetchall()
-            
-            cur.execute(
-                """
-                SELECT id, gym_name, gym_chain, location, country
-                FROM vw_pending_rejected_gym
-                """
-            )
-            climb_queue = cur.fetchall()
-            return {"grade_queue": grade_queue, "climb_queue": climb_queue}, 200
+            for name, sql, key in (
+                ("grade", _GRADE_QUEUE_SQL, "grade_id"),
+                ("location", _LOCATION_QUEUE_SQL, "id"),
+            ):
+                if name not in wanted:
+                    continue
+                cur.execute(sql, {**filters, "after": after[name]})
+                rows = cur.fetchall()
+                if len(rows) > limit:
+                    rows = rows[:limit]
+                    next_cursor[name] = _encode_queue_cursor(rows[-1][key])
+                queues[name] = rows
+
+            cur.execute(_APPROVAL_QUEUE_COUNTS_SQL)
+            counts = cur.fetchone()
     except Exception:
         logger.exception("approval_queue failed")
         return err("db_error", "Database error.", 500)
 
+    return {
+        "grade_queue": queues["grade"],
+        "climb_queue": queues["location"],
+        "next_cursor": next_cursor,
+        "counts": counts,
+    }, 200
+
 
 _APPROVAL_PROCS = {
     'grade': 'sp_approve_grade_system',
     'location': 'sp_approve_climb_location',
 }
 
+# Batches at least this large send all their decisions in one pipeline.
+APPROVAL_PIPELINE_MIN_ITEMS = int(os.getenv("APPROVAL_PIPELINE_MIN_ITEMS", "8"))
+_CALL_DONE = (pq.ExecStatus.COMMAND_OK, pq.ExecStatus.TUPLES_OK)
+
+# Reference-cache entries that go stale once a decision of this type is applied.
+_APPROVAL_CACHE_KEYS = {
+    'grade': GRADES_KEY,
+    'location': CLIMB_LOCATIONS_KEY,
+}
+
+
+def _call_approval(cur, user_id: str, item_type: str, item_id: int, action: str) -> None:
+    cur.execute(
+        f"CALL {_APPROVAL_PROCS[item_type]}(%s, %s, %s, %s)",
+        (item_id, user_id, action == 'approve', None),
+    )
+
+
+def _apply_one_by_one(conn, user_id: str, items: list) -> list:
+    """Apply items under a savepoint each. Returns None (applied) or the exception per item."""
+    outcomes = []
+    with conn.cursor() as cur:
+        for item in items:
+            try:
+                with conn.transaction():
+                    _call_approval(cur, user_id, *item)
+                outcomes.append(None)
+            except Exception as e:
+                outcomes.append(e)
+    return outcomes
+
+
+def _apply_pipelined(conn, user_id: str, items: list) -> list:
+    """
+    Same as _apply_one_by_one, but with the SAVEPOINT / CALL / RELEASE of all
+    items sent in one pipeline: one round trip for the batch plus one per
+    failing item. A failure aborts the rest of the pipeline, so the failed item
+    is rolled back to its savepoint and the items after it are sent again.
+    """
+    outcomes = []
+    while len(outcomes) < len(items):
+        calls = []
+        try:
+            with conn.pipeline(), conn.cursor() as sp:
+                for item in items[len(outcomes):]:
+                    call = conn.cursor()
+                    calls.append(call)
+                    sp.execute("SAVEPOINT approval_item")
+                    _call_approval(call, user_id, *item)
+                    sp.execute("RELEASE SAVEPOINT approval_item")
+            outcomes.extend([None] * len(calls))
+        except psycopg.Error as e:
+            # Calls before the failing one have their result; the rest were skipped.
+            failed = next((i for i, c in enumerate(calls) if c.pgresult is None or c.pgresult.status not in _CALL_DONE), None)
+            if failed is None:
+                raise
+            outcomes.extend([None] * failed + [e])
+            conn.execute("ROLLBACK TO SAVEPOINT approval_item")
+        finally:
+            for call in calls:
+                call.close()
+    return outcomes
+
 
 def submit_approval_decision(user_id: str, payload: dict):
     """
@@ -166,8 +364,11 @@ def submit_approval_decision(user_id: str, payload: dict):
         ]
     }
 
-    Each decision commits in its own transaction; a failing item does not roll
-    back the others. Returns a per-item result summary.
+    The batch runs on one connection in one transaction, with a savepoint per
+    decision: a failing item is rolled back alone and does not affect the
+    others. Batches of APPROVAL_PIPELINE_MIN_ITEMS or more are pipelined.
+    Returns a per-item result summary. Cached grade / location lists touched by
+    an applied decision are evicted once the batch commits.
     """
     if not isinstance(payload, dict) or not payload:
         return err("invalid_request", "No payload", 400)
@@ -177,6 +378,7 @@ def submit_approval_decision(user_id: str, payload: dict):
         return err("invalid_request", "Invalid decisions", 400)
 
     results = []
+    pending = []  # (index in results, (item_type, item_id, action))
     seen_pairs = set()
     for decision in decisions:
         if not isinstance(decision, dict):
@@ -206,12 +408,36 @@ def submit_approval_decision(user_id: str, payload: dict):
             continue
         seen_pairs.add(pair)
 
-        is_approved = action == 'approve'
-        proc = _APPROVAL_PROCS[item_type]
+        pending.append((len(results), (item_type, item_id, action)))
+        results.append(None)
+
+    items = [item for _, item in pending]
+    outcomes = []
+    if items:
+        apply = _apply_pipelined if len(items) >= APPROVAL_PIPELINE_MIN_ITEMS else _apply_one_by_one
         try:
-            with pool.connection() as conn, conn.transaction(), conn.cursor(row_factory=dict_row) as cur:
-                cur.execute(f"CALL {proc}(%s, %s, %s, %s)", (item_id, user_id, is_approved, None))
-            results.append({"itemType": item_type, "itemId": item_id, "ok": True, "action": action})
+            with pool.connection() as conn, conn.transaction():
+                outcomes = apply(conn, user_id, items)
+                # A decision can change a system's grades, so re-rank its stored routes.
+                graded = sorted(
+                    item_id
+                    for (item_type, item_id, _), error in zip(items, outcomes)
+                    if item_type == 'grade' and error is None
+                )
+                if graded:
+                    with conn.cursor() as cur:
+                        reranked = refresh_grade_ranks(cur, graded)
+                    logger.info("grade_rank refreshed grade_ids=%s routes=%s", graded, reranked)
+        except Exception as e:
+            # Nothing was committed.
+            logger.exception("approval_decision_batch failed user_id=%s items=%s", user_id, len(items))
+            outcomes = [e] * len(items)
+
+    stale_keys = set()
+    for (index, (item_type, item_id, action)), error in zip(pending, outcomes):
+        if error is None:
+            results[index] = {"itemType": item_type, "itemId": item_id, "ok": True, "action": action}
+            stale_keys.add(_APPROVAL_CACHE_KEYS[item_type])
             logger.info(
                 "approval_decision_applied user_id=%s item_type=%s item_id=%s action=%s",
                 user_id,
@@ -219,15 +445,19 @@ def submit_approval_decision(user_id: str, payload: dict):
                 item_id,
                 action,
             )
-        except Exception:
-            logger.exception(
-                "approval_decision failed user_id=%s item_type=%s item_id=%s action=%s",
+        else:
+            results[index] = {"itemType": item_type, "itemId": item_id, "ok": False, "error": "Database error"}
+            logger.error(
+                "approval_decision failed user_id=%s item_type=%s item_id=%s action=%s error=%s",
                 user_id,
                 item_type,
                 item_id,
                 action,
+                error,
             )
-            results.append({"itemType": item_type, "itemId": item_id, "ok": False, "error": "Database error"})
+
+    if stale_keys:
+        reference_cache.invalidate(*sorted(stale_keys))
 
     logger.info(
         "approval_decision_batch completed user_id=%s total=%s succeeded=%s",
@@ -1,50 +1,166 @@
+import base64
+import binascii
+import csv
+import io
 import logging
+import os
+from contextlib import ExitStack
+from datetime import date, time
+from flask import Response
 from psycopg.rows import dict_row
-from utils.connect_db import pool
+from utils.db_routing import connection, read_only
+from utils.json_provider import dumps_bytes
+from services.import_service import IMPORT_COLUMNS
+from services.stats_service import CLIMB_STATS_TIMEZONE
 from utils.relative_day import get_relative_day
 
 logger = logging.getLogger("climbge-api")
 
 
-def fetch_climb_history(user_id: str):
+HISTORY_DEFAULT_LIMIT = 50
+HISTORY_MAX_LIMIT = 200
+
+
+def _encode_history_cursor(climb_date: date, session_seq) -> str:
+    raw = f"{climb_date.isoformat()}|{session_seq}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_history_cursor(cursor: str):
+    padded = cursor + "=" * (-len(cursor) % 4)
+    climb_date, session_seq = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+    return date.fromisoformat(climb_date), int(session_seq)
+
+
+def parse_history_params(limit, cursor, date_from, date_to):
+    """Validate query-string params. Returns (limit, cursor_key, date_from, date_to, error)."""
+    def bad(message):
+        return None, None, None, None, ({"error": {"code": "invalid_input", "message": message}}, 422)
+
+    if limit in (None, ""):
+        parsed_limit = HISTORY_DEFAULT_LIMIT
+    else:
+        try:
+            parsed_limit = int(limit)
+        except (TypeError, ValueError):
+            return bad("limit must be an integer.")
+        if parsed_limit < 1:
+            return bad("limit must be at least 1.")
+        parsed_limit = min(parsed_limit, HISTORY_MAX_LIMIT)
+
+    cursor_key = None
+    if cursor:
+        try:
+            cursor_key = _decode_history_cursor(cursor)
+        except (ValueError, UnicodeDecodeError, binascii.Error):
+            return bad("Invalid cursor.")
+
+    parsed_dates = []
+    for label, value in (("from", date_from), ("to", date_to)):
+        if not value:
+            parsed_dates.append(None)
+            continue
+        try:
+            parsed_dates.append(date.fromisoformat(value))
+        except (TypeError, ValueError):
+            return bad(f"{label} must be YYYY-MM-DD.")
+
+    return parsed_limit, cursor_key, parsed_dates[0], parsed_dates[1], None
+
+
+@read_only
+def fetch_climb_history(user_id: str, *, limit=None, cursor=None, date_from=None, date_to=None):
     """
-    Fetches the climbing history for a user.
-    Returns a list of dictionaries with session details.
+    Fetches one page of the climbing history for a user, newest first.
+
+    Pages are keyed on (climb_date, session_seq): pass the returned
+    next_cursor back as `cursor` to get the following page. `date_from` /
+    `date_to` (YYYY-MM-DD, inclusive) narrow the range. next_cursor is None
+    on the last page.
     """
+    limit, cursor_key, date_from, date_to, error = parse_history_params(limit, cursor, date_from, date_to)
+    if error:
+        return error
+
+    sql, params = climb_history_query(user_id, limit, cursor_key, date_from, date_to)
     try:
-        with pool.connection() as conn, conn.transaction(), conn.cursor(row_factory=dict_row) as cur:
-            cur.execute(
-                """
-                SELECT sent, attempted, flashes, best,
-                       TRIM(TRAILING '.' FROM TRIM(TRAILING '0' FROM
-                       TO_CHAR((sent / NULLIF(attempted, 0)::float) * 100, 'FM999D99'))) AS sent_pct,
-                       climb_date, location
-                FROM climber_session_history
-                WHERE user_id = %s
-                ORDER BY climb_date desc, session_seq desc
-                """,
-                (user_id,)
-            )
-            row = cur.fetchall()
-
-        history = [
-            {
-                "sent": r["sent"] if r["sent"] is not None else 0,
-                "attempted": r["attempted"] if r["attempted"] is not None else '-',
-                "flashes": r["flashes"] if r["flashes"] is not None else 0,
-                "best": r["best"] if r["best"] is not None else '-',
-                "sentPct": f'{r["sent_pct"]}%' if r["sent_pct"] else '0%',
-                "climbDay": get_relative_day(r["climb_date"], week_cap=3),
-                "location": r["location"]
-            } for r in row
-        ]
-        return {'history': history}, 200
+        with connection() as conn, conn.transaction(), conn.cursor(row_factory=dict_row) as cur:
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+        return climb_history_from_rows(rows, limit), 200
 
     except Exception:
         logger.exception("history fetch failed user_id=%s", user_id)
         return {"error": {"code": "db_error", "message": "Could not fetch history!"}}, 500
 
 
+def climb_history_query(user_id: str, limit: int, cursor_key, date_from, date_to):
+    """(sql, params) for one history page, on already-validated parameters."""
+    conditions = ["user_id = %s"]
+    params = [user_id]
+    if date_from:
+        conditions.append("climb_date >= %s")
+        params.append(date_from)
+    if date_to:
+        conditions.append("climb_date <= %s")
+        params.append(date_to)
+    if cursor_key:
+        conditions.append("(climb_date, session_seq) < (%s, %s)")
+        params.extend(cursor_key)
+    # One extra row tells us whether another page exists.
+    params.append(limit + 1)
+
+    sql = (
+        """
+        SELECT sent, attempted, flashes, best,
+               TRIM(TRAILING '.' FROM TRIM(TRAILING '0' FROM
+               TO_CHAR((sent / NULLIF(attempted, 0)::float) * 100, 'FM999D99'))) AS sent_pct,
+               climb_date, session_seq, location
+        FROM climb_session_stats
+        WHERE """
+        + " AND ".join(conditions)
+        + """
+        ORDER BY climb_date desc, session_seq desc
+        LIMIT %s
+        """
+    )
+    return sql, params
+
+
+def climb_history_from_rows(rows, limit: int):
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_history_cursor(rows[-1]["climb_date"], rows[-1]["session_seq"])
+
+    history = [
+        {
+            "sent": r["sent"] if r["sent"] is not None else 0,
+            "attempted": r["attempted"] if r["attempted"] is not None else '-',
+            "flashes": r["flashes"] if r["flashes"] is not None else 0,
+            "best": r["best"] if r["best"] is not None else '-',
+            "sentPct": f'{r["sent_pct"]}%' if r["sent_pct"] else '0%',
+            "climbDay": get_relative_day(r["climb_date"], week_cap=3),
+            "location": r["location"]
+        } for r in rows
+    ]
+    return {'history': history, 'next_cursor': next_cursor}
+
+
+LAST_CLIMB_SQL = """
+    select location, climb_date, best, sent, attempted
+    from user_last_climb
+    where user_id = %s
+    """
+
+WEEKLY_STATS_SQL = """
+    select total_session, sent, attempted
+    from user_weekly_stats
+    where user_id = %s and week_start = date_trunc('week', now() AT TIME ZONE %s)::date
+    """
+
+
+@read_only
 def fetch_last_climb(user_id: str):
     """
     Fetches the last climbing session for a user.
@@ -52,40 +168,35 @@ def fetch_last_climb(user_id: str):
     Returns the stats of the last climb session.
     """
     try:
-        with pool.connection() as conn, conn.transaction(), conn.cursor(row_factory=dict_row) as cur:
-            cur.execute(
-                """
-                select location, climb_date, best, sent, attempted
-                from last_climb_session
-                where user_id = %s
-                limit 1
-                """,
-                (user_id,)
-            )
+        with connection() as conn, conn.transaction(), conn.cursor(row_factory=dict_row) as cur:
+            cur.execute(LAST_CLIMB_SQL, (user_id,))
             row = cur.fetchone()
-        if not row:
-            last_climb = {
-                "location": None,
-                "climbDate": None,
-                "highestGrade": None,
-                "totalSent": None,
-                "totalAttempted": None,
-            }
-            return last_climb, 200
-
-        last_climb = {
-            "location": row["location"],
-            "climbDate": row["climb_date"].strftime("%Y-%m-%d"),
-            "highestGrade": row["best"],
-            "totalSent": row["sent"],
-            "totalAttempted": row["attempted"]
-        }
-        return last_climb, 200
+        return last_climb_from_row(row), 200
 
     except Exception:
         logger.exception("last_climb fetch failed user_id=%s", user_id)
         return {"error": {"code": "db_error", "message": "Could not fetch last climb data!"}}, 500
 
+
+def last_climb_from_row(row):
+    if not row:
+        return {
+            "location": None,
+            "climbDate": None,
+            "highestGrade": None,
+            "totalSent": None,
+            "totalAttempted": None,
+        }
+
+    return {
+        "location": row["location"],
+        "climbDate": row["climb_date"].strftime("%Y-%m-%d"),
+        "highestGrade": row["best"],
+        "totalSent": row["sent"],
+        "totalAttempted": row["attempted"]
+    }
+
+@read_only
 def fetch_weekly_stats(user_id: str):
     """
     Fetches the weekly stats for a user.
@@ -93,32 +204,119 @@ def fetch_weekly_stats(user_id: str):
     Returns the weekly total of sends, attempts, and highest grade for the running week.
     """
     try:
-        with pool.connection() as conn, conn.transaction(), conn.cursor(row_factory=dict_row) as cur:
-            cur.execute(
-                """
-                select total_session, sent, attempted
-                from weekly_stats
-                where user_id = %s
-                limit 1
-                """,
-                (user_id,)
-            )
+        with connection() as conn, conn.transaction(), conn.cursor(row_factory=dict_row) as cur:
+            cur.execute(WEEKLY_STATS_SQL, (user_id, CLIMB_STATS_TIMEZONE))
             row = cur.fetchone()
-        if not row:
-            weekly_stats = {
-                "totalSession": None,
-                "totalSent": None,
-                "totalAttempted": None,
-            }
-            return weekly_stats, 200
-
-        weekly_stats = {
-            "totalSession": row["total_session"],
-            "totalSent": row["sent"],
-            "totalAttempted": row["attempted"]
-        }
-        return weekly_stats, 200
+        return weekly_stats_from_row(row), 200
 
     except Exception:
         logger.exception("weekly_stats fetch failed user_id=%s", user_id)
         return {"error": {"code": "db_error", "message": "Could not fetch weekly climb statistics!"}}, 500
+
+
+def weekly_stats_from_row(row):
+    if not row:
+        return {
+            "totalSession": None,
+            "totalSent": None,
+            "totalAttempted": None,
+        }
+
+    return {
+        "totalSession": row["total_session"],
+        "totalSent": row["sent"],
+        "totalAttempted": row["attempted"]
+    }
+
+
+# ---------- Export ----------
+# Rows per round trip from the server-side cursor; memory is bounded by this
+# however long the history is.
+EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", "1000"))
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+# One row per route in the import layout (IMPORT_COLUMNS), so an export can be
+# imported again; session_key is the session id.
+EXPORT_SQL = """
+    SELECT s.session_id AS session_key, s.started_at, s.ended_at, s.location, s.notes,
+           r.grade_system, NULL AS grade_system_label, r.grade_label, r.description,
+           r.attempts, r.sent, r.sent_at
+    FROM climb_sessions s
+    LEFT JOIN session_routes r ON r.session_id = s.session_id
+    WHERE s.user_id = %s
+      AND (%s::date IS NULL OR s.started_at >= %s::date)
+      AND (%s::date IS NULL OR s.started_at < %s::date + 1)
+    ORDER BY s.started_at, s.session_id, r.sent_at NULLS LAST
+    """
+
+
+def _csv_value(v):
+    if v is None:
+        return ""
+    if isinstance(v, bool):
+        return "true" if v else "false"
+    if isinstance(v, (date, time)):
+        return v.isoformat()
+    return v
+
+
+def _export_chunks(cur, fmt, counter):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if fmt == "csv":
+        writer.writerow(IMPORT_COLUMNS)
+    while rows := cur.fetchmany(EXPORT_FETCH_SIZE):
+        counter[0] += len(rows)
+        if fmt == "ndjson":
+            yield b"".join(dumps_bytes(r) + b"\n" for r in rows)
+            continue
+        for r in rows:
+            writer.writerow([_csv_value(r[c]) for c in IMPORT_COLUMNS])
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        # Header only: no rows matched.
+        yield buf.getvalue().encode()
+
+
+@read_only
+def export_history(user_id: str, *, fmt="csv", date_from=None, date_to=None):
+    """
+    Stream every session and route of a user as CSV or NDJSON, one row per
+    route (sessions without routes get one row with empty route columns).
+    `date_from` / `date_to` (YYYY-MM-DD, inclusive) filter on started_at.
+
+    Rows come from a named (server-side) cursor, EXPORT_FETCH_SIZE at a time.
+    The connection is taken here, so connection errors still give a 500
+    before streaming starts. It is held until the response is closed.
+    """
+    if fmt not in EXPORT_FORMATS:
+        return {"error": {"code": "invalid_input", "message": "format must be csv or ndjson."}}, 422
+    _, _, date_from, date_to, error = parse_history_params(None, None, date_from, date_to)
+    if error:
+        return error
+
+    stack = ExitStack()
+    try:
+        conn = stack.enter_context(connection())
+        # Named cursors only live inside a transaction.
+        stack.enter_context(conn.transaction())
+        cur = stack.enter_context(conn.cursor(name="history_export", row_factory=dict_row))
+        cur.execute(EXPORT_SQL, (user_id, date_from, date_from, date_to, date_to))
+    except Exception:
+        stack.close()
+        logger.exception("history export failed user_id=%s", user_id)
+        return {"error": {"code": "db_error", "message": "Could not export history!"}}, 500
+
+    def generate():
+        counter = [0]
+        with stack:
+            yield from _export_chunks(cur, fmt, counter)
+        logger.info("history export finished user_id=%s format=%s rows=%s", user_id, fmt, counter[0])
+
+    resp = Response(generate(), mimetype=EXPORT_FORMATS[fmt])
+    resp.headers["Content-Disposition"] = f'attachment; filename="climbge-history.{fmt}"'
+    # An unstarted generator is never entered, so close the cursor here too.
+    resp.call_on_close(stack.close)
+    return resp, 200
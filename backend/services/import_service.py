@@ -0,0 +1,295 @@
+import csv
+import io
+import json
+import logging
+import os
+import tempfile
+import uuid
+from utils.connect_db import pool
+from services.climb_service import grade_registry, session_params, session_route_rows
+from services.stats_service import refresh_user_climb_stats
+
+logger = logging.getLogger("climbge-api")
+
+# Rows are COPYed in chunks of this many routes, so memory stays flat however
+# large the upload is.
+IMPORT_CHUNK_ROWS = int(os.getenv("IMPORT_CHUNK_ROWS", "1000"))
+IMPORT_MAX_ROWS = int(os.getenv("IMPORT_MAX_ROWS", "100000"))
+# The upload is read into a temp file (in memory up to IMPORT_SPOOL_BYTES)
+# before a DB connection is taken, so a slow client never holds one.
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(32 * 1024 * 1024)))
+IMPORT_SPOOL_BYTES = int(os.getenv("IMPORT_SPOOL_BYTES", str(1024 * 1024)))
+# Only the first errors are listed; the rest are counted.
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "200"))
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# One row per route. Session columns are read from the first row of each
+# session_key (default: started_at); a row without grade_label only creates
+# the session.
+IMPORT_COLUMNS = (
+    "session_key", "started_at", "ended_at", "location", "notes",
+    "grade_system", "grade_system_label", "grade_label", "description",
+    "attempts", "sent", "sent_at",
+)
+
+_COPY_SESSIONS = "COPY climb_sessions (session_id, user_id, started_at, ended_at, notes, location) FROM STDIN"
+_COPY_ROUTES = (
+    "COPY session_routes (session_id, grade_system, grade_label, attempts, sent, sent_at, description, grade_rank)"
+    " FROM STDIN"
+)
+_COPY_UNKNOWN = "COPY unknown_grade_systems (grade_id, grade_system, grades) FROM STDIN"
+
+_TRUE = ("1", "true", "t", "yes", "y")
+_FALSE = ("", "0", "false", "f", "no", "n")
+
+
+def _blank(v):
+    return None if v is None or (isinstance(v, str) and not v.strip()) else v
+
+
+def _int_field(row, name, default=None):
+    v = _blank(row.get(name))
+    if v is None:
+        if default is None:
+            raise ValueError(f"{name} is required")
+        return default
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer") from None
+
+
+def _text_field(row, name):
+    v = _blank(row.get(name))
+    if v is not None and not isinstance(v, str):
+        raise ValueError(f"{name} must be an ISO 8601 string")
+    return v
+
+
+def _str_field(row, name):
+    """Optional free-text column. NDJSON numbers are taken as their text; other non-strings are rejected."""
+    v = _blank(row.get(name))
+    if v is None or isinstance(v, str):
+        return v
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return str(v)
+    raise ValueError(f"{name} must be a string")
+
+
+def _bool_field(row, name):
+    v = row.get(name)
+    if isinstance(v, bool) or v is None:
+        return bool(v)
+    s = str(v).strip().lower()
+    if s in _TRUE:
+        return True
+    if s in _FALSE:
+        return False
+    raise ValueError(f"{name} must be true or false")
+
+
+def _route(row):
+    """commit-session route dict from an import row (CSV values are all strings)."""
+    return {
+        "grade_system": _int_field(row, "grade_system", default=999),
+        "grade_system_label": _str_field(row, "grade_system_label"),
+        "grade_label": _str_field(row, "grade_label") or "",
+        "description": _str_field(row, "description"),
+        "attempts": _int_field(row, "attempts") if _blank(row.get("grade_label")) else 1,
+        "sent": _bool_field(row, "sent"),
+        "sent_at": _text_field(row, "sent_at"),
+    }
+
+
+def _buffer_upload(stream):
+    """Copy the request body into a temp file, rewound; raises _TooLarge past IMPORT_MAX_BYTES."""
+    spool = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES)
+    size = 0
+    try:
+        while chunk := stream.read(64 * 1024):
+            size += len(chunk)
+            if size > IMPORT_MAX_BYTES:
+                raise _TooLarge()
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+def _read_rows(stream, fmt):
+    """Yield (row_number, dict | None, error) from a binary stream, one line at a time."""
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+    for n, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield n, None, "invalid JSON"
+            continue
+        if not isinstance(row, dict):
+            yield n, None, "each line must be a JSON object"
+            continue
+        yield n, row, None
+
+
+class _TooManyRows(Exception):
+    pass
+
+
+class _TooLarge(Exception):
+    pass
+
+
+class _Importer:
+    def __init__(self, cur, user_id, registry):
+        self.cur = cur
+        self.user_id = user_id
+        self.registry = registry
+        self.sessions = {}        # session_key -> session_id, or None if that session was rejected
+        self.pending_sessions = []
+        self.pending_routes = []
+        self.pending_unknown = []
+        self.session_count = 0
+        self.route_count = 0
+        self.errors = []
+        self.error_count = 0
+
+    def error(self, row_number, message):
+        self.error_count += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"row": row_number, "error": message})
+
+    def add(self, row_number, row):
+        try:
+            key = _str_field(row, "session_key") or _text_field(row, "started_at")
+        except ValueError as e:
+            self.error(row_number, str(e))
+            return
+        if key is None:
+            self.error(row_number, "session_key or started_at is required")
+            return
+
+        if key not in self.sessions:
+            try:
+                started_at = _text_field(row, "started_at")
+                ended_at = _text_field(row, "ended_at")
+                if not started_at or not ended_at:
+                    raise ValueError("Missing session start or end time")
+                params = session_params(
+                    user_id=self.user_id,
+                    started_at=started_at,
+                    ended_at=ended_at,
+                    notes=_str_field(row, "notes"),
+                    location=_str_field(row, "location"),
+                )
+            except ValueError as e:
+                self.sessions[key] = None
+                self.error(row_number, str(e))
+                return
+            session_id = uuid.uuid4()
+            self.sessions[key] = session_id
+            self.pending_sessions.append((session_id,) + params)
+            self.session_count += 1
+        elif self.sessions[key] is None:
+            self.error(row_number, f"session {key!r} was rejected on an earlier row")
+            return
+
+        try:
+            route = _route(row)
+            if route["grade_label"] and route["grade_system"] not in self.registry.system_ids:
+                raise ValueError(f"unknown grade_system {route['grade_system']}")
+            route_rows, unknown_rows = session_route_rows(self.sessions[key], [route], self.registry)
+        except (ValueError, TypeError) as e:
+            self.error(row_number, str(e))
+            return
+        self.pending_routes.extend(route_rows)
+        self.pending_unknown.extend(unknown_rows)
+        self.route_count += len(route_rows)
+        if len(self.pending_routes) >= IMPORT_CHUNK_ROWS:
+            self.flush()
+
+    def flush(self):
+        for sql, rows in (
+            (_COPY_SESSIONS, self.pending_sessions),
+            (_COPY_ROUTES, self.pending_routes),
+            (_COPY_UNKNOWN, self.pending_unknown),
+        ):
+            if rows:
+                with self.cur.copy(sql) as copy:
+                    for r in rows:
+                        copy.write_row(r)
+                rows.clear()
+
+
+def import_sessions(user_id: str, stream, fmt: str):
+    """
+    Import sessions and routes for user_id from a CSV (with a header row) or
+    NDJSON upload. Columns: IMPORT_COLUMNS. The whole upload is buffered
+    (up to IMPORT_MAX_BYTES) before the transaction starts, then parsed
+    incrementally from the buffer.
+
+    Every row is checked with the commit-session rules. Valid rows are
+    written with COPY in chunks of IMPORT_CHUNK_ROWS, all in one transaction.
+    Invalid rows are skipped and listed in the report with their line number.
+    """
+    if fmt not in IMPORT_FORMATS:
+        return {"error": f"Unsupported format, use one of: {', '.join(IMPORT_FORMATS)}"}, 415
+
+    rows_read = 0
+    try:
+        upload = _buffer_upload(stream)
+    except _TooLarge:
+        return {"error": f"Upload too large, the limit is {IMPORT_MAX_BYTES} bytes."}, 413
+
+    try:
+        registry = grade_registry()
+        with upload, pool.connection() as conn, conn.transaction(), conn.cursor() as cur:
+            importer = _Importer(cur, user_id, registry)
+            for row_number, row, parse_error in _read_rows(upload, fmt):
+                rows_read += 1
+                if rows_read > IMPORT_MAX_ROWS:
+                    raise _TooManyRows()
+                if parse_error:
+                    importer.error(row_number, parse_error)
+                    continue
+                importer.add(row_number, row)
+            importer.flush()
+            if importer.session_count:
+                refresh_user_climb_stats(cur, user_id, [sid for sid in importer.sessions.values() if sid])
+
+    except _TooManyRows:
+        return {"error": f"Too many rows, the limit is {IMPORT_MAX_ROWS}."}, 413
+
+    except (UnicodeDecodeError, csv.Error) as e:
+        return {"error": f"Could not read the upload: {e}"}, 400
+
+    except Exception:
+        logger.exception("session_import failed user_id=%s rows=%s", user_id, rows_read)
+        return {"error": "Something happened while importing the sessions."}, 500
+
+    logger.info(
+        "session_import committed user_id=%s format=%s rows=%s sessions=%s routes=%s errors=%s",
+        user_id,
+        fmt,
+        rows_read,
+        importer.session_count,
+        importer.route_count,
+        importer.error_count,
+    )
+    return {
+        "ok": True,
+        "rows": rows_read,
+        "sessions": importer.session_count,
+        "routes": importer.route_count,
+        "error_count": importer.error_count,
+        "errors": importer.errors,
+    }, 200
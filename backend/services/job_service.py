@@ -0,0 +1,99 @@
+import logging
+import os
+from psycopg.rows import dict_row
+from psycopg.types.json import Jsonb
+from utils.connect_db import pool
+
+logger = logging.getLogger("climbge-api")
+
+JOB_PASSWORD_RESET_EMAIL = "password_reset_email"
+
+# Retry schedule: JOB_RETRY_BASE_SECONDS * 2^(attempt-1), capped.
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "30"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "3600"))
+# A job still 'running' after this long is assumed to belong to a dead worker.
+JOB_LOCK_TIMEOUT_SECONDS = float(os.getenv("JOB_LOCK_TIMEOUT_SECONDS", "300"))
+
+
+def enqueue_job(cur, job_type: str, payload: dict, *, max_attempts: int = 5) -> int:
+    """
+    Queue a job on the caller's cursor, so it commits (or rolls back) together
+    with the caller's transaction. Returns the job id.
+    """
+    cur.execute(
+        """
+        INSERT INTO public.background_jobs (job_type, payload, max_attempts)
+        VALUES (%s, %s, %s)
+        RETURNING id
+        """,
+        (job_type, Jsonb(payload), max_attempts),
+    )
+    row = cur.fetchone()
+    return row["id"] if isinstance(row, dict) else row[0]
+
+
+def claim_jobs(limit: int = 10) -> list[dict]:
+    """Atomically mark up to `limit` due jobs as running and return them."""
+    with pool.connection() as conn, conn.transaction(), conn.cursor(row_factory=dict_row) as cur:
+        cur.execute(
+            """
+            UPDATE public.background_jobs j
+            SET status = 'running', locked_at = now(), attempts = j.attempts + 1, updated_at = now()
+            WHERE j.id IN (
+                SELECT id
+                FROM public.background_jobs
+                WHERE (status = 'pending' AND run_at <= now())
+                   OR (status = 'running' AND locked_at < now() - make_interval(secs => %s))
+                ORDER BY run_at
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING j.id, j.job_type, j.payload, j.attempts, j.max_attempts
+            """,
+            (JOB_LOCK_TIMEOUT_SECONDS, limit),
+        )
+        return cur.fetchall()
+
+
+def complete_job(job_id: int) -> None:
+    # Payloads can carry secrets (e.g. reset links), so drop them once delivered.
+    with pool.connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE public.background_jobs
+            SET status = 'done', payload = '{}'::jsonb, locked_at = NULL, last_error = NULL, updated_at = now()
+            WHERE id = %s
+            """,
+            (job_id,),
+        )
+
+
+def fail_job(job: dict, error: str) -> None:
+    """Reschedule with exponential backoff, or give up after max_attempts."""
+    attempts = job["attempts"]
+    give_up = attempts >= job["max_attempts"]
+    delay = min(JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), JOB_RETRY_MAX_SECONDS)
+    with pool.connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE public.background_jobs
+            SET status = %s,
+                payload = CASE WHEN %s THEN '{}'::jsonb ELSE payload END,
+                run_at = now() + make_interval(secs => %s),
+                locked_at = NULL,
+                last_error = %s,
+                updated_at = now()
+            WHERE id = %s
+            """,
+            ("failed" if give_up else "pending", give_up, delay, error[:2000], job["id"]),
+        )
+    if give_up:
+        logger.error("job failed permanently job_id=%s job_type=%s attempts=%s", job["id"], job["job_type"], attempts)
+    else:
+        logger.warning(
+            "job failed job_id=%s job_type=%s attempts=%s retry_in=%.0fs",
+            job["id"],
+            job["job_type"],
+            attempts,
+            delay,
+        )
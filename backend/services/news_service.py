@@ -1,25 +1,31 @@
 import logging
 from psycopg.rows import dict_row
-from utils.connect_db import pool
+from utils.cache import reference_cache, NEWS_KEY
+from utils.db_routing import connection, read_only
 from utils.http import err
 
 logger = logging.getLogger("climbge-api")
 
 
+@read_only
 def fetch_news():
     """Fetch the latest news posts (newest first, capped at 3)."""
     try:
-        with pool.connection() as conn, conn.transaction(), conn.cursor(row_factory=dict_row) as cur:
-            cur.execute(
-                """
-                SELECT title, body, publish_date
-                FROM vw_news
-                """
-            )
-            rows = cur.fetchall()
-
+        rows = reference_cache.get_or_load(NEWS_KEY, _load_news)
         return {"news": rows}, 200
 
     except Exception:
         logger.exception("news fetch failed")
         return err("db_error", "Could not fetch news post!", 500)
+
+
+NEWS_SQL = """
+    SELECT title, body, publish_date
+    FROM vw_news
+    """
+
+
+def _load_news():
+    with connection() as conn, conn.transaction(), conn.cursor(row_factory=dict_row) as cur:
+        cur.execute(NEWS_SQL)
+        return cur.fetchall()
@@ -0,0 +1,150 @@
+import logging
+import os
+from utils.connect_db import pool
+
+logger = logging.getLogger("climbge-api")
+
+# Summary tables (migrations/002_climb_stats.sql):
+#   climb_session_stats  one row per session, as climber_session_history
+#                        returns it (climb_date, per-day session_seq, counts).
+#   user_last_climb      the user's climb_session_stats row with the highest
+#                        (climb_date, session_seq).
+#   user_weekly_stats    climb_session_stats summed per Monday-based week of
+#                        climb_date. climb_date is a calendar date, so the week
+#                        is computed on it as a plain timestamp and does not
+#                        depend on the DB session's TimeZone.
+# The last two are defined here, not copied from the old last_climb_session /
+# weekly_stats views. "This week" is read in CLIMB_STATS_TIMEZONE (see
+# history_service.WEEKLY_STATS_SQL).
+CLIMB_STATS_TIMEZONE = os.getenv("CLIMB_STATS_TIMEZONE", os.getenv("TZ", "Asia/Jakarta"))
+
+# Each statement takes an optional filter, "" for everyone.
+_SESSION_STATS_SQL = """
+    INSERT INTO public.climb_session_stats
+        (user_id, climb_date, session_seq, sent, attempted, flashes, best, location)
+    SELECT user_id, climb_date, session_seq, sent, attempted, flashes, best, location
+    FROM public.climber_session_history
+    {where}
+    """
+
+_LAST_CLIMB_SQL = """
+    INSERT INTO public.user_last_climb (user_id, location, climb_date, best, sent, attempted)
+    SELECT DISTINCT ON (user_id) user_id, location, climb_date, best, sent, attempted
+    FROM public.climb_session_stats
+    {where}
+    ORDER BY user_id, climb_date DESC, session_seq DESC
+    """
+
+_WEEK_START = "date_trunc('week', climb_date::timestamp)::date"
+
+_WEEKLY_STATS_SQL = f"""
+    INSERT INTO public.user_weekly_stats (user_id, week_start, total_session, sent, attempted)
+    SELECT user_id, {_WEEK_START}, count(*), sum(sent), sum(attempted)
+    FROM public.climb_session_stats
+    {{where}}
+    GROUP BY user_id, {_WEEK_START}
+    """
+
+_TABLES = ("climb_session_stats", "user_last_climb", "user_weekly_stats")
+
+# The days a set of new sessions can land on, whatever zone climber_session_history
+# takes climb_date in: the UTC date of started_at, one day either side.
+_AFFECTED_DAYS = """
+    SELECT DISTINCT (s.started_at AT TIME ZONE 'UTC')::date + d.shift AS day
+    FROM public.climb_sessions s
+    CROSS JOIN (VALUES (-1), (0), (1)) AS d(shift)
+    WHERE s.session_id = ANY(%s::uuid[])
+    """
+
+_AFFECTED_WEEKS = f"SELECT DISTINCT date_trunc('week', day::timestamp)::date FROM ({_AFFECTED_DAYS}) days"
+
+# Every day of those weeks, so the re-sum reads climb_session_stats by primary key.
+_AFFECTED_WEEK_DAYS = f"SELECT w.week_start + d FROM ({_AFFECTED_WEEKS}) w(week_start), generate_series(0, 6) d"
+
+
+def _lock_statement(user_id: str):
+    # Serialise concurrent commits by the same user; otherwise both would
+    # delete the same days, then the second insert would hit the first one's rows.
+    return "SELECT pg_advisory_xact_lock(hashtext('climb_stats:' || %s))", (str(user_id),)
+
+
+def user_climb_stats_statements(user_id: str, session_ids):
+    """
+    [(sql, params), ...] that bring one user's summary rows up to date after
+    `session_ids` were inserted. Run them in order inside the caller's
+    transaction, after the sessions and their routes.
+
+    Only the days the new sessions fall on are re-read from
+    climber_session_history (a new session can renumber session_seq for its
+    day), and only the weeks holding those days are re-summed. The last climb
+    is one index lookup on climb_session_stats.
+    """
+    session_ids = list(session_ids)
+    params = (user_id, session_ids)
+    days = f"WHERE user_id = %s AND climb_date IN ({_AFFECTED_DAYS})"
+    weeks = f"WHERE user_id = %s AND week_start IN ({_AFFECTED_WEEKS})"
+    week_days = f"WHERE user_id = %s AND climb_date IN ({_AFFECTED_WEEK_DAYS})"
+    return [
+        _lock_statement(user_id),
+        (f"DELETE FROM public.climb_session_stats {days}", params),
+        (_SESSION_STATS_SQL.format(where=days), params),
+        (f"DELETE FROM public.user_weekly_stats {weeks}", params),
+        (_WEEKLY_STATS_SQL.format(where=week_days), params),
+        (
+            """
+            INSERT INTO public.user_last_climb (user_id, location, climb_date, best, sent, attempted)
+            SELECT user_id, location, climb_date, best, sent, attempted
+            FROM public.climb_session_stats
+            WHERE user_id = %s
+            ORDER BY climb_date DESC, session_seq DESC
+            LIMIT 1
+            ON CONFLICT (user_id) DO UPDATE SET
+                location = EXCLUDED.location,
+                climb_date = EXCLUDED.climb_date,
+                best = EXCLUDED.best,
+                sent = EXCLUDED.sent,
+                attempted = EXCLUDED.attempted
+            """,
+            (user_id,),
+        ),
+    ]
+
+
+def refresh_user_climb_stats(cur, user_id: str, session_ids) -> None:
+    """
+    Fold newly inserted sessions into one user's summary rows on the caller's
+    cursor, so they commit (or roll back) together with the caller's transaction.
+    """
+    for sql, params in user_climb_stats_statements(user_id, session_ids):
+        cur.execute(sql, params)
+
+
+def _rebuild_user_statements(user_id: str):
+    statements = [_lock_statement(user_id)]
+    for table in _TABLES:
+        statements.append((f"DELETE FROM public.{table} WHERE user_id = %s", (user_id,)))
+    for sql in (_SESSION_STATS_SQL, _LAST_CLIMB_SQL, _WEEKLY_STATS_SQL):
+        statements.append((sql.format(where="WHERE user_id = %s"), (user_id,)))
+    return statements
+
+
+def rebuild_climb_stats(user_id: str | None = None) -> int:
+    """
+    Rebuild the summary tables from climb_sessions/session_routes, for one
+    user or (user_id=None) for everyone. Returns the number of session rows
+    written.
+    """
+    with pool.connection() as conn, conn.transaction(), conn.cursor() as cur:
+        if user_id is not None:
+            for sql, params in _rebuild_user_statements(user_id):
+                cur.execute(sql, params)
+            cur.execute("SELECT count(*) FROM public.climb_session_stats WHERE user_id = %s", (user_id,))
+        else:
+            cur.execute("TRUNCATE " + ", ".join(f"public.{t}" for t in _TABLES))
+            for sql in (_SESSION_STATS_SQL, _LAST_CLIMB_SQL, _WEEKLY_STATS_SQL):
+                cur.execute(sql.format(where=""))
+            cur.execute("SELECT count(*) FROM public.climb_session_stats")
+        sessions = cur.fetchone()[0]
+
+    logger.info("climb_stats rebuilt user_id=%s sessions=%s", user_id or "*", sessions)
+    return sessions
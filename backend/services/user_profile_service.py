@@ -1,34 +1,47 @@
-from utils.connect_db import pool
+from utils.auth import remember_user_role
+from utils.db_routing import connection, read_only
 from psycopg.rows import dict_row
 
 
+USER_PROFILE_SQL = """
+    SELECT
+      user_id,
+      username,
+      started_climbing,
+      age,
+      home_city,
+      home_gym,
+      sex,
+      name,
+      email,
+      height,
+      weight,
+      ape_index,
+      grip_strength,
+      unit_of_measurement,
+      role
+    FROM public.user_profile
+    WHERE user_id = %s
+    LIMIT 1
+        """
+
+
+@read_only
 def fetch_user_profile(user_id):
-    with pool.connection() as conn, conn.cursor(row_factory=dict_row) as cur:
-        cur.execute("""
-            SELECT
-              user_id,
-              username,
-              started_climbing,
-              age,
-              home_city,
-              home_gym,
-              sex,
-              name,
-              email,
-              height,
-              weight,
-              ape_index,
-              grip_strength,
-              unit_of_measurement,
-              role
-            FROM public.user_profile
-            WHERE user_id = %s
-            LIMIT 1
-        """, (user_id,))
+    with connection() as conn, conn.cursor(row_factory=dict_row) as cur:
+        cur.execute(USER_PROFILE_SQL, (user_id,))
         row = cur.fetchone()
+    return user_profile_from_row(user_id, row)
+
+
+def user_profile_from_row(user_id, row):
+    """Shape a USER_PROFILE_SQL row for the FE (None when the user is gone)."""
+    if not row:
+        remember_user_role(user_id, None, exists=False)
+        return None
 
-        if not row:
-            return None
+    # Approver-only endpoints read the role from this cache.
+    remember_user_role(user_id, row.get("role"))
 
     unit = (row.get("unit_of_measurement"))
 
@@ -48,7 +61,7 @@ def fetch_user_profile(user_id):
         grip_strength = normalize_unit(row.get('grip_strength'), "kg")
 
     return {
-        'user_id': str(row['user_id']),
+        'user_id': row['user_id'],
         'username': row['username'],
         'role': row.get('role'),
         'demography': {
@@ -0,0 +1,39 @@
+"""
+asyncio counterpart of utils/connect_db.py, used by services/async_services.py
+and asgi.py. Same DSN and sizing settings. The pool is created closed; the
+ASGI app opens it on startup (open_async_pool) because an AsyncConnectionPool
+has to be opened inside the running event loop.
+"""
+from psycopg_pool import AsyncConnectionPool
+from .connect_db import (
+    dsn,
+    DB_POOL_MIN_SIZE,
+    DB_POOL_MAX_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_POOL_MAX_IDLE,
+    DB_POOL_MAX_LIFETIME,
+    DB_POOL_PREWARM,
+)
+from .query_stats import InstrumentedAsyncCursor
+
+async_pool = AsyncConnectionPool(
+    conninfo=dsn,
+    min_size=DB_POOL_MIN_SIZE,
+    max_size=DB_POOL_MAX_SIZE,
+    timeout=DB_POOL_TIMEOUT,
+    max_idle=DB_POOL_MAX_IDLE,
+    max_lifetime=DB_POOL_MAX_LIFETIME,
+    kwargs={"autocommit": True, "cursor_factory": InstrumentedAsyncCursor},
+    open=False,
+    name="async_pool",
+)
+
+
+async def open_async_pool() -> None:
+    await async_pool.open()
+    if DB_POOL_PREWARM:
+        await async_pool.wait(timeout=DB_POOL_TIMEOUT)
+
+
+async def close_async_pool() -> None:
+    await async_pool.close()
@@ -1,13 +1,34 @@
 from functools import wraps
 import logging
+import os
 from flask import session
 from .http import err
+from .cache import TTLCache
 from .connect_db import pool
 
 logger = logging.getLogger("climbge-api")
 
 # Roles allowed to review (approve / reject) submissions.
 APPROVER_ROLES = ("admin", "approver")
+# Roles allowed to see operational endpoints (pool stats etc.).
+ADMIN_ROLES = ("admin",)
+
+# Roles barely ever change, so each worker remembers them briefly. Unknown
+# user ids are cached too (for a shorter time) so a stale session can't turn
+# every request into a lookup.
+#
+# The app never writes users.role; roles are changed with SQL. Such a change
+# reaches a worker's cache when the user next logs in there (login re-reads the
+# role from the primary) and everywhere else within ROLE_CACHE_TTL seconds, so
+# a revoked approver/admin keeps access for at most that long. Lower the TTL,
+# or restart the API, when that window matters.
+ROLE_CACHE_TTL = float(os.getenv("ROLE_CACHE_TTL", "30"))
+ROLE_CACHE_NEGATIVE_TTL = float(os.getenv("ROLE_CACHE_NEGATIVE_TTL", "10"))
+ROLE_CACHE_MAXSIZE = int(os.getenv("ROLE_CACHE_MAXSIZE", "4096"))
+
+role_cache = TTLCache("user_roles", ttl=ROLE_CACHE_TTL, maxsize=ROLE_CACHE_MAXSIZE)
+_MISSING = object()
+_NO_USER = "__no_user__"
 
 def login_required(fn):
     @wraps(fn)
@@ -18,24 +39,45 @@ def login_required(fn):
     return wrapper
 
 
+def remember_user_role(user_id, role, *, exists: bool = True):
+    """Prime the role cache from a query that already read the role (e.g. the profile)."""
+    if exists:
+        role_cache.set(str(user_id), role)
+    else:
+        role_cache.set(str(user_id), _NO_USER, ttl=ROLE_CACHE_NEGATIVE_TTL)
+
+
+def invalidate_user_role(user_id=None):
+    """Forget one user's cached role (or all of them); call after changing users.role."""
+    if user_id is None:
+        role_cache.invalidate()
+    else:
+        role_cache.invalidate(str(user_id))
+
+
 def _get_user_role(user_id):
+    cached = role_cache.get(str(user_id), _MISSING)
+    if cached is not _MISSING:
+        return None if cached == _NO_USER else cached
+
     with pool.connection() as conn, conn.cursor() as cur:
         cur.execute("SELECT role FROM public.users WHERE user_id = %s LIMIT 1", (user_id,))
         row = cur.fetchone()
+    remember_user_role(user_id, row[0] if row else None, exists=row is not None)
     return row[0] if row else None
 
 
-def approver_required(fn):
-    """Allow only logged-in users whose role is admin or approver."""
+def _role_required(roles, label, fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
         uid = session.get("user_id")
         if not uid:
             return err("unauthorized", "Not logged in.", 401)
         role = _get_user_role(uid)
-        if role not in APPROVER_ROLES:
+        if role not in roles:
             logger.warning(
-                "approver_required denied user_id=%s role=%s endpoint=%s",
+                "%s denied user_id=%s role=%s endpoint=%s",
+                label,
                 uid,
                 role,
                 fn.__name__,
@@ -43,3 +85,13 @@ def approver_required(fn):
             return err("forbidden", "You do not have permission to do this.", 403)
         return fn(*args, **kwargs)
     return wrapper
+
+
+def approver_required(fn):
+    """Allow only logged-in users whose role is admin or approver."""
+    return _role_required(APPROVER_ROLES, "approver_required", fn)
+
+
+def admin_required(fn):
+    """Allow only logged-in users whose role is admin."""
+    return _role_required(ADMIN_ROLES, "admin_required", fn)
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger("climbge-api")
+
+
+class TTLCache:
+    """
+    Small thread-safe in-process cache with per-entry TTL and an LRU size bound.
+
+    Each gunicorn worker holds its own copy, so an explicit invalidate() only
+    clears the worker that handled the write; the TTL bounds how long the other
+    workers can serve stale data.
+    """
+
+    def __init__(self, name: str, ttl: float, maxsize: int = 128):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # key -> (expires_at, value, etag)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _live_entry(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return entry[1]
+
+    def etag(self, key):
+        """Content version of a live entry, or None. Does not count as a hit/miss."""
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is None:
+                return None
+            if entry[2] is None:
+                # Hashed on first request and kept until the entry is replaced.
+                entry = (entry[0], entry[1], _content_etag(entry[1]))
+                self._data[key] = entry
+            return entry[2]
+
+    def set(self, key, value, ttl: float | None = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value, None)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for key, calling loader() and caching its result on a miss."""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is not sentinel:
+            return value
+        return self.set(key, loader())
+
+    def invalidate(self, *keys):
+        """Drop the given keys, or everything when called without arguments."""
+        with self._lock:
+            if not keys:
+                self._data.clear()
+            else:
+                for key in keys:
+                    self._data.pop(key, None)
+        logger.info("cache_invalidated cache=%s keys=%s", self.name, ",".join(map(str, keys)) or "*")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def _content_etag(value) -> str:
+    raw = json.dumps(value, sort_keys=True, default=str, separators=(",", ":")).encode()
+    return hashlib.sha1(raw).hexdigest()
+
+
+# Grades, climb locations and news only change when an approver acts (or a
+# news post is published), so they are served from memory between refreshes.
+REFERENCE_CACHE_TTL = float(os.getenv("REFERENCE_CACHE_TTL", "300"))
+REFERENCE_CACHE_MAXSIZE = int(os.getenv("REFERENCE_CACHE_MAXSIZE", "32"))
+
+GRADES_KEY = "grades"
+CLIMB_LOCATIONS_KEY = "climb_locations"
+NEWS_KEY = "news"
+
+reference_cache = TTLCache("reference", ttl=REFERENCE_CACHE_TTL, maxsize=REFERENCE_CACHE_MAXSIZE)
@@ -0,0 +1,100 @@
+"""
+Response compression for the API (gzip, and brotli when the module is
+installed).
+
+A response is compressed when the client accepts the encoding, it is a 200
+with a compressible mimetype, and its body is at least COMPRESS_MIN_SIZE
+bytes. Streamed responses and ones that already carry a Content-Encoding are
+left alone.
+
+A compressed response's ETag gets the encoding appended ("<tag>-gzip"), so
+a cache keyed on the tag never serves gzip bytes for the identity response or
+the other way round. conditional_get accepts the suffixed tags in
+If-None-Match.
+
+Responses tagged with a shared content version by conditional_get (grades,
+climb locations, news) are compressed once per version and encoding. The
+result is kept in compressed_cache.
+"""
+import gzip
+import logging
+import os
+from flask import Flask, g, request
+from .cache import TTLCache, REFERENCE_CACHE_TTL
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+logger = logging.getLogger("climbge-api")
+
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))                   # gzip 1-9
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "5"))  # brotli 0-11
+COMPRESS_MIMETYPES = frozenset(
+    m.strip()
+    for m in os.getenv("COMPRESS_MIMETYPES", "application/json,text/plain,text/csv,text/html").split(",")
+    if m.strip()
+)
+COMPRESSED_CACHE_MAXSIZE = int(os.getenv("COMPRESSED_CACHE_MAXSIZE", "32"))
+
+# (content version, encoding) -> compressed body. Versions are content hashes,
+# so an entry can never be stale; the TTL only bounds memory for old versions.
+compressed_cache = TTLCache("compressed", ttl=REFERENCE_CACHE_TTL, maxsize=COMPRESSED_CACHE_MAXSIZE)
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=COMPRESS_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=COMPRESS_LEVEL, mtime=0)
+
+
+def _encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def _negotiate():
+    offered = [e for e in _encodings() if request.accept_encodings[e]]
+    if not offered:
+        return None
+    # Highest q wins; ties go to the order of _encodings() (brotli first).
+    return max(offered, key=lambda e: request.accept_encodings[e])
+
+
+def install_compression(app: Flask) -> None:
+    @app.after_request
+    def _compress_response(resp):
+        resp.vary.add("Accept-Encoding")
+        if (
+            resp.status_code != 200
+            or resp.direct_passthrough
+            or resp.is_streamed
+            or "Content-Encoding" in resp.headers
+            or resp.mimetype not in COMPRESS_MIMETYPES
+        ):
+            return resp
+
+        encoding = _negotiate()
+        if encoding is None:
+            return resp
+
+        data = resp.get_data()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return resp
+
+        version = g.get("content_version")
+        if version and resp.get_etag()[0] == version:
+            key = (version, encoding)
+            body = compressed_cache.get(key)
+            if body is None:
+                body = compressed_cache.set(key, _compress(data, encoding))
+        else:
+            body = _compress(data, encoding)
+
+        resp.set_data(body)
+        resp.headers["Content-Encoding"] = encoding
+        etag, weak = resp.get_etag()
+        if etag:
+            resp.set_etag(f"{etag}-{encoding}", weak)
+        return resp
@@ -1,6 +1,7 @@
 import os
 from psycopg.conninfo import make_conninfo
 from psycopg_pool import ConnectionPool
+from .query_stats import InstrumentedCursor
 
 
 def required_env(name: str) -> str:
@@ -16,6 +17,15 @@ DB_HOST = required_env("DB_HOST")
 DB_PORT = os.getenv("DB_PORT", "5432")
 DB_NAME = os.getenv("DB_NAME", "postgres")
 
+# Pool sizing. Size max_size to (gunicorn threads per worker) plus a little
+# headroom; /api/admin/pool-stats shows whether requests are queueing.
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", "600"))
+DB_POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", "3600"))
+DB_POOL_PREWARM = os.getenv("DB_POOL_PREWARM", "").strip().lower() in ("1", "true", "yes", "on")
+
 dsn = make_conninfo(
     "",
     user=DB_USER,
@@ -27,7 +37,58 @@ dsn = make_conninfo(
 
 pool = ConnectionPool(
     conninfo=dsn,
-    min_size=1,
-    max_size=10,
-    kwargs={"autocommit": True},
+    min_size=DB_POOL_MIN_SIZE,
+    max_size=DB_POOL_MAX_SIZE,
+    timeout=DB_POOL_TIMEOUT,
+    max_idle=DB_POOL_MAX_IDLE,
+    max_lifetime=DB_POOL_MAX_LIFETIME,
+    kwargs={"autocommit": True, "cursor_factory": InstrumentedCursor},
 )
+
+# Optional streaming replica for read-only services (see utils/db_routing.py).
+# Credentials, port and database default to the primary's.
+DB_READ_HOST = os.getenv("DB_READ_HOST") or None
+DB_READ_PORT = os.getenv("DB_READ_PORT", DB_PORT)
+DB_READ_USER = os.getenv("DB_READ_USER", DB_USER)
+DB_READ_PASS = os.getenv("DB_READ_PASS", DB_PASS)
+DB_READ_NAME = os.getenv("DB_READ_NAME", DB_NAME)
+DB_READ_POOL_MAX_SIZE = int(os.getenv("DB_READ_POOL_MAX_SIZE", str(DB_POOL_MAX_SIZE)))
+
+read_pool = None
+if DB_READ_HOST:
+    read_pool = ConnectionPool(
+        conninfo=make_conninfo(
+            "",
+            user=DB_READ_USER,
+            password=DB_READ_PASS,
+            host=DB_READ_HOST,
+            port=DB_READ_PORT,
+            dbname=DB_READ_NAME,
+        ),
+        min_size=DB_POOL_MIN_SIZE,
+        max_size=DB_READ_POOL_MAX_SIZE,
+        timeout=DB_POOL_TIMEOUT,
+        max_idle=DB_POOL_MAX_IDLE,
+        max_lifetime=DB_POOL_MAX_LIFETIME,
+        kwargs={"autocommit": True, "cursor_factory": InstrumentedCursor},
+        name="read_pool",
+    )
+
+if DB_POOL_PREWARM:
+    # Block worker start-up until min_size connections are open, so the first
+    # burst after a deploy doesn't pay for connection setup. A replica that is
+    # down must not stop the API from starting, so only the primary is awaited.
+    pool.wait(timeout=DB_POOL_TIMEOUT)
+
+
+def pool_stats() -> dict:
+    """Configured limits plus live psycopg_pool counters (without resetting them)."""
+    return {
+        "min_size": pool.min_size,
+        "max_size": pool.max_size,
+        "timeout": pool.timeout,
+        "max_idle": pool.max_idle,
+        "max_lifetime": pool.max_lifetime,
+        "stats": pool.get_stats(),
+        "read_pool": read_pool.get_stats() if read_pool is not None else None,
+    }
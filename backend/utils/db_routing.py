@@ -0,0 +1,157 @@
+"""
+Send read-only service functions to the replica pool (DB_READ_HOST).
+
+Services decorated with @read_only take their connection from connection(),
+which picks the replica when all of these hold:
+
+  - a replica is configured;
+  - its last health probe succeeded and it was at most
+    DB_READ_MAX_LAG_SECONDS behind;
+  - the caller has not written in the last DB_READ_AFTER_WRITE_SECONDS.
+
+In every other case the function reads from the primary. The last check gives
+read-your-writes: install_read_your_writes() stamps the session cookie after
+every successful write request (commit-session, user-measurements, ...). The
+stamp travels with the client, so it works whichever gunicorn worker serves
+the next read.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from flask import Flask, has_request_context, request, session
+from .connect_db import pool, read_pool
+
+logger = logging.getLogger("climbge-api")
+
+DB_READ_MAX_LAG_SECONDS = float(os.getenv("DB_READ_MAX_LAG_SECONDS", "5"))
+DB_READ_AFTER_WRITE_SECONDS = float(os.getenv("DB_READ_AFTER_WRITE_SECONDS", "10"))
+# How often each worker re-probes the replica, and how long a probe may wait
+# for a connection.
+DB_READ_HEALTH_INTERVAL = float(os.getenv("DB_READ_HEALTH_INTERVAL", "5"))
+DB_READ_CONNECT_TIMEOUT = float(os.getenv("DB_READ_CONNECT_TIMEOUT", "1"))
+
+LAST_WRITE_KEY = "db_last_write"
+
+# Caught up when everything received has been replayed; otherwise the age of
+# the last replayed transaction. Comparing LSNs first keeps an idle primary
+# (no new transactions to replay) from looking like lag.
+_REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+
+_read_only: ContextVar[bool] = ContextVar("db_read_only", default=False)
+
+
+class _ReplicaHealth:
+    """Per-worker probe result, refreshed at most every DB_READ_HEALTH_INTERVAL seconds."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked_at = float("-inf")
+        self.healthy = False
+        self.lag = None
+
+    def usable(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < DB_READ_HEALTH_INTERVAL:
+                return self.healthy
+            # Claim this probe so concurrent requests keep using the old answer.
+            self._checked_at = now
+        self._set(*self._probe())
+        return self.healthy
+
+    def mark_down(self) -> None:
+        with self._lock:
+            self._checked_at = time.monotonic()
+        self._set(False, None)
+
+    def _probe(self):
+        try:
+            with read_pool.connection(timeout=DB_READ_CONNECT_TIMEOUT) as conn:
+                lag = float(conn.execute(_REPLICA_LAG_SQL).fetchone()[0])
+        except Exception as e:
+            logger.warning("replica probe failed error=%s", e.__class__.__name__)
+            return False, None
+        return lag <= DB_READ_MAX_LAG_SECONDS, lag
+
+    def _set(self, healthy: bool, lag) -> None:
+        if healthy != self.healthy:
+            logger.log(
+                logging.INFO if healthy else logging.WARNING,
+                "replica %s lag=%s max_lag=%s",
+                "available" if healthy else "unavailable",
+                "-" if lag is None else f"{lag:.1f}s",
+                DB_READ_MAX_LAG_SECONDS,
+            )
+        self.healthy = healthy
+        self.lag = lag
+
+
+replica_health = _ReplicaHealth()
+
+
+def read_only(fn):
+    """Mark a service function as read-only so connection() may use the replica."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _read_only.set(True)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _read_only.reset(token)
+    return wrapper
+
+
+def _wrote_recently() -> bool:
+    if not has_request_context():
+        return False
+    last_write = session.get(LAST_WRITE_KEY)
+    return last_write is not None and time.time() - last_write < DB_READ_AFTER_WRITE_SECONDS
+
+
+def _use_replica() -> bool:
+    return read_pool is not None and _read_only.get() and not _wrote_recently() and replica_health.usable()
+
+
+@contextmanager
+def connection():
+    """
+    A pooled connection: from the replica inside @read_only functions when it
+    is usable, otherwise from the primary. Drop-in for pool.connection().
+    """
+    if _use_replica():
+        try:
+            conn = read_pool.getconn(timeout=DB_READ_CONNECT_TIMEOUT)
+        except Exception as e:
+            logger.warning("replica connect failed, using primary error=%s", e.__class__.__name__)
+            replica_health.mark_down()
+        else:
+            try:
+                yield conn
+            finally:
+                read_pool.putconn(conn)
+            return
+
+    with pool.connection() as conn:
+        yield conn
+
+
+def install_read_your_writes(app: Flask) -> None:
+    """Stamp the session after successful writes so the writer's next reads skip the replica."""
+    if read_pool is None:
+        return
+
+    @app.after_request
+    def _stamp_last_write(resp):
+        if request.method in ("POST", "PUT", "PATCH", "DELETE") and resp.status_code < 400:
+            session[LAST_WRITE_KEY] = time.time()
+        return resp
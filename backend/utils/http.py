@@ -1,7 +1,86 @@
-from flask import jsonify
+from functools import wraps
+from flask import g, jsonify, make_response, request
 
 def ok(payload=None, status=200):
     return jsonify(payload or {}), status
 
-def err(code: str, message: str, status=400):
-    return jsonify(error={"code": code, "message": message}), status
+def err(code: str, message: str, status=400, **details):
+    return jsonify(error={"code": code, "message": message, **details}), status
+
+
+def client_ip() -> str | None:
+    # Prefer CF-Connecting-IP/X-Forwarded-For behind proxies. The client can set
+    # these headers, so this is for logging only; never key limits or access on it.
+    return (
+        request.headers.get("CF-Connecting-IP")
+        or request.headers.get("X-Forwarded-For", "").split(",")[0].strip()
+        or request.remote_addr
+    )
+
+
+# utils.compression appends the content coding to the ETag of a compressed
+# body ("<tag>-gzip"), so identity and compressed responses never share a tag.
+ETAG_ENCODING_SUFFIXES = ("gzip", "br")
+
+
+def _client_etag(tag: str) -> str | None:
+    """The form of `tag` (plain or encoding-suffixed) the client sent in If-None-Match."""
+    for candidate in (tag, *(f"{tag}-{e}" for e in ETAG_ENCODING_SUFFIXES)):
+        if request.if_none_match.contains(candidate):
+            return candidate
+    return None
+
+
+def _cache_headers(resp, private: bool):
+    # Clients may keep the body but must revalidate with If-None-Match.
+    resp.cache_control.no_cache = True
+    if private:
+        resp.cache_control.private = True
+    else:
+        resp.cache_control.public = True
+    return resp
+
+
+def conditional_get(version=None, private: bool = True):
+    """
+    Add ETag / If-None-Match handling to a GET view.
+
+    `version` is an optional zero-arg callable returning the current content
+    version (e.g. a reference-cache etag) or None when unknown. A known version
+    that matches If-None-Match short-circuits to 304 before the view runs, so
+    neither the DB nor the JSON encoder is touched. Otherwise the view runs and
+    a 200 response is tagged with the version, or a hash of its body, and
+    turned into a 304 if the client already has it.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if request.method != "GET":
+                return fn(*args, **kwargs)
+
+            tag = version() if version else None
+            client_tag = _client_etag(tag) if tag else None
+            if client_tag:
+                resp = make_response("", 304)
+                resp.set_etag(client_tag)
+                return _cache_headers(resp, private)
+
+            resp = make_response(fn(*args, **kwargs))
+            if resp.status_code != 200:
+                return resp
+
+            tag = version() if version else None
+            if tag:
+                resp.set_etag(tag)
+                # Same bytes for every caller: lets utils.compression reuse its compressed body.
+                g.content_version = tag
+            else:
+                resp.add_etag()
+            # A client holding the compressed variant sent the suffixed tag; answer
+            # its revalidation with a 304 too.
+            client_tag = _client_etag(resp.get_etag()[0])
+            if client_tag:
+                resp.set_etag(client_tag)
+            return _cache_headers(resp, private).make_conditional(request)
+        return wrapper
+    return decorator
@@ -0,0 +1,75 @@
+"""
+JSON provider for the API: encodes rows straight from psycopg without
+per-field conversion in the services.
+
+UUID -> "8c1e...", date/datetime/time -> ISO 8601 (Flask's default sends
+dates as HTTP dates), Decimal -> string. Keys keep insertion order.
+
+Uses orjson when it is installed (it is optional, not in pyproject) and the
+stdlib encoder otherwise. For strings, ints, UUIDs, dates and Decimals the two
+produce the same bytes. Floats do not always match:
+
+  - exponents: orjson writes 1e16 / 1e-7 where the stdlib writes 1e+16 / 1e-07
+    (both valid JSON, same value);
+  - NaN / Infinity: orjson writes null, the stdlib writes the non-standard
+    NaN / Infinity tokens.
+
+orjson rejects integers outside the 64-bit range; those payloads are encoded
+with the stdlib instead, so they still serialise.
+"""
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, time
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+
+def _default(o):
+    if isinstance(o, (date, time)):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj) -> bytes:
+    """Compact UTF-8 JSON."""
+    if orjson is not None:
+        # orjson handles UUID/date/datetime/time itself; _default only sees the rest.
+        try:
+            return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            # e.g. "Integer exceeds 64-bit range"; a truly unserialisable
+            # object raises again below.
+            pass
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class FastJSONProvider(JSONProvider):
+    mimetype = "application/json"
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs:
+            # Callers asking for indent/sort_keys etc. get the stdlib encoder.
+            kwargs.setdefault("default", _default)
+            return json.dumps(obj, **kwargs)
+        return dumps_bytes(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj) + b"\n", mimetype=self.mimetype)
@@ -5,6 +5,8 @@ import sys
 import time
 from typing import Optional
 from flask import Flask, g, request, session
+from . import query_stats
+from .http import client_ip
 
 def setup_logging(
     name: str,
@@ -28,13 +30,29 @@ def setup_logging(
     logging.getLogger("urllib3").setLevel(os.getenv("NOISY_LOG_LEVEL", "WARNING"))
     return logger
 
-def install_api_request_logging(app: Flask, logger: logging.Logger) -> None:
-    """Attach before/after request hooks to log each API call."""
+def install_api_request_logging(app: Flask, logger: logging.Logger, metrics=None) -> None:
+    """
+    Attach before/after request hooks to log each API call. When `metrics`
+    (utils.metrics.Metrics) is given, the same timings feed its latency
+    histograms, status counters and in-flight gauge.
+    """
     @app.before_request
     def _start_timer():
         # skip static or health if you want:
         # if request.path.startswith("/static"): return
         g._req_start = time.perf_counter()
+        g._query_stats_token = query_stats.begin_request()
+        if metrics is not None:
+            metrics.request_started()
+            g._metrics_in_flight = True
+
+    @app.teardown_request
+    def _end_in_flight(_exc):
+        if metrics is not None and g.pop("_metrics_in_flight", False):
+            metrics.request_finished()
+        token = g.pop("_query_stats_token", None)
+        if token is not None:
+            query_stats.end_request(token)
 
     @app.after_request
     def _log_request(resp):
@@ -43,22 +61,44 @@ def install_api_request_logging(app: Flask, logger: logging.Logger) -> None:
 
         user_id = getattr(g, "user_id", None) or session.get("user_id", "-")
 
-        # Prefer CF-Connecting-IP/X-Forwarded-For behind proxies
-        ip = (
-            request.headers.get("CF-Connecting-IP")
-            or request.headers.get("X-Forwarded-For", "").split(",")[0].strip()
-            or request.remote_addr
-        )
+        ip = client_ip()
+
+        if metrics is not None and start:
+            # Unmatched URLs share one label value to keep cardinality bounded.
+            metrics.observe_request(
+                request.blueprint,
+                request.endpoint or "unmatched",
+                request.method,
+                resp.status_code,
+                dur_ms / 1000,
+            )
+
+        stats = query_stats.current_stats()
+        db_queries = stats.queries if stats else 0
+        db_ms = stats.total_ms if stats else 0.0
 
         log = logger.warning if resp.status_code >= 500 else logger.info
 
         log(
-            "%s %s user=%s status=%s duration=%.1fms ip=%s",
+            "%s %s user=%s status=%s duration=%.1fms db_queries=%s db_ms=%.1f ip=%s",
             request.method,
             request.path,
             user_id,
             resp.status_code,
             dur_ms if dur_ms is not None else -1,
+            db_queries,
+            db_ms,
             ip,
         )
+
+        if stats:
+            for shape, count in stats.repeated():
+                logger.warning(
+                    "repeated_query %s %s count=%s threshold=%s sql=%s",
+                    request.method,
+                    request.path,
+                    count,
+                    query_stats.DB_REPEATED_QUERY_THRESHOLD,
+                    shape,
+                )
         return resp
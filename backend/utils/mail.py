@@ -15,7 +15,59 @@ class MailDeliveryError(Exception):
     """Raised when an email cannot be delivered."""
 
 
-def send_password_reset_email(to_email: str, reset_link: str) -> None:
+class SMTPMailer:
+    """
+    Keeps one authenticated SMTP connection open and reuses it across sends.
+
+    Meant for the job worker, which sends mail back to back; the connection is
+    re-established when the server has dropped it. Not thread-safe.
+    """
+
+    def __init__(self):
+        self._server = None
+
+    def _connect(self):
+        ssl_context = ssl.create_default_context()
+        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        try:
+            server.ehlo()
+            server.starttls(context=ssl_context)
+            server.ehlo()
+            server.login(SMTP_USER, SMTP_PASS)
+        except Exception:
+            server.close()
+            raise
+        self._server = server
+
+    def _ensure_connected(self):
+        if self._server is not None:
+            try:
+                if self._server.noop()[0] == 250:
+                    return
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.close()
+        self._connect()
+
+    def send(self, to_email: str, msg) -> None:
+        try:
+            self._ensure_connected()
+            self._server.sendmail(SMTP_USER, to_email, msg.as_string())
+        except (smtplib.SMTPException, OSError, TimeoutError) as exc:
+            self.close()
+            raise MailDeliveryError("email delivery failed") from exc
+
+    def close(self) -> None:
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            self._server.close()
+        self._server = None
+
+
+def build_password_reset_message(to_email: str, reset_link: str) -> MIMEMultipart:
     msg = MIMEMultipart("alternative")
     msg["From"] = SMTP_USER
     msg["To"] = to_email
@@ -37,14 +89,18 @@ def send_password_reset_email(to_email: str, reset_link: str) -> None:
 
     msg.attach(MIMEText(text, "plain"))
     msg.attach(MIMEText(html, "html"))
+    return msg
+
+
+def send_password_reset_email(to_email: str, reset_link: str, mailer: SMTPMailer | None = None) -> None:
+    """Send a reset mail, over `mailer`'s open connection when given, else a one-off connection."""
+    msg = build_password_reset_message(to_email, reset_link)
+    if mailer is not None:
+        mailer.send(to_email, msg)
+        return
 
-    ssl_context = ssl.create_default_context()
+    oneoff = SMTPMailer()
     try:
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT) as server:
-            server.ehlo()
-            server.starttls(context=ssl_context)
-            server.ehlo()
-            server.login(SMTP_USER, SMTP_PASS)
-            server.sendmail(SMTP_USER, to_email, msg.as_string())
-    except (smtplib.SMTPException, OSError, TimeoutError) as exc:
-        raise MailDeliveryError("password reset email delivery failed") from exc
+        oneoff.send(to_email, msg)
+    finally:
+        oneoff.close()
@@ -0,0 +1,285 @@
+"""
+Prometheus text-format metrics without extra dependencies.
+
+Every gunicorn worker keeps its own counters in memory. When
+METRICS_MULTIPROC_DIR is set, each worker also writes a JSON snapshot of them
+to that directory (at most every METRICS_FLUSH_INTERVAL seconds). /metrics
+then merges all snapshots, so a scrape sees every worker whichever one serves
+it. Gauges are only reported for workers that are still alive.
+
+gunicorn.conf.py keeps the directory tidy: on_starting empties it, and
+child_exit folds an exited worker's counters and histograms into archive.json
+and removes its snapshot, so totals never go backwards and the directory does
+not grow with every worker restart. This module must stay importable in the
+gunicorn master, which is why the DB pool is only imported when a snapshot is
+taken.
+
+/metrics is only served when METRICS_TOKEN is set; scrapers send it as
+"Authorization: Bearer <token>". Without a token the endpoint answers 404.
+"""
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from flask import Flask, Response, request
+from .cache import TTLCache
+
+logger = logging.getLogger("climbge-api")
+
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR") or None
+if METRICS_MULTIPROC_DIR:
+    os.makedirs(METRICS_MULTIPROC_DIR, exist_ok=True)
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "1"))
+# Shared secret for scrapers; /metrics stays off until it is set.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN") or None
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (blueprint, endpoint, method) -> [bucket counts..., sum, count]
+        self._durations = {}
+        # (blueprint, endpoint, method, status) -> count
+        self._requests = {}
+        self._in_flight = 0
+        self._caches = []
+        self._last_flush = 0.0
+
+    def track_cache(self, cache: TTLCache) -> None:
+        self._caches.append(cache)
+
+    def request_started(self) -> None:
+        with self._lock:
+            self._in_flight += 1
+
+    def request_finished(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def observe_request(self, blueprint, endpoint, method, status, seconds) -> None:
+        key = (blueprint or "", endpoint or "", method)
+        with self._lock:
+            hist = self._durations.get(key)
+            if hist is None:
+                hist = self._durations[key] = [0] * len(DURATION_BUCKETS) + [0.0, 0]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if seconds <= bound:
+                    hist[i] += 1
+            hist[-2] += seconds
+            hist[-1] += 1
+            rkey = key + (str(status),)
+            self._requests[rkey] = self._requests.get(rkey, 0) + 1
+        self._maybe_flush()
+
+    # ---------- snapshots ----------
+    def snapshot(self) -> dict:
+        from .connect_db import pool
+
+        with self._lock:
+            snap = {
+                "pid": os.getpid(),
+                "durations": [list(k) + v for k, v in self._durations.items()],
+                "requests": [list(k) + [v] for k, v in self._requests.items()],
+                "in_flight": self._in_flight,
+            }
+        snap["pool"] = pool.get_stats()
+        snap["caches"] = [c.stats() for c in self._caches]
+        return snap
+
+    def flush(self) -> None:
+        """Write this worker's snapshot now (gunicorn's worker_exit hook calls this)."""
+        self._maybe_flush(force=True)
+
+    def _maybe_flush(self, force: bool = False) -> None:
+        if not METRICS_MULTIPROC_DIR:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < METRICS_FLUSH_INTERVAL:
+            return
+        self._last_flush = now
+        path = os.path.join(METRICS_MULTIPROC_DIR, f"worker_{os.getpid()}.json")
+        tmp = f"{path}.tmp"
+        try:
+            with open(tmp, "w") as fh:
+                json.dump(self.snapshot(), fh)
+            os.replace(tmp, path)
+        except Exception:
+            logger.warning("metrics flush failed path=%s", path, exc_info=True)
+
+    def _all_snapshots(self) -> list[dict]:
+        if not METRICS_MULTIPROC_DIR:
+            return [self.snapshot()]
+        self._maybe_flush(force=True)
+        snaps = []
+        for name in os.listdir(METRICS_MULTIPROC_DIR):
+            if name != ARCHIVE_FILE and not (name.startswith("worker_") and name.endswith(".json")):
+                continue
+            snap = _read_json(os.path.join(METRICS_MULTIPROC_DIR, name))
+            if snap is not None:
+                snaps.append(snap)
+        return snaps
+
+    # ---------- exposition ----------
+    def render(self) -> str:
+        snaps = self._all_snapshots()
+        durations, requests_total, caches = _merge_counters(snaps)
+        live = [snap for snap in snaps if snap.get("pid") and _pid_alive(snap["pid"])]
+
+        out = []
+        name = "climbge_http_request_duration_seconds"
+        out += [f"# HELP {name} API request latency.", f"# TYPE {name} histogram"]
+        for (bp, ep, method), values in sorted(durations.items()):
+            labels = {"blueprint": bp, "endpoint": ep, "method": method}
+            # observe_request counts a sample in every bucket it fits, so these are cumulative.
+            for bound, count in zip(DURATION_BUCKETS, values):
+                out.append(f"{name}_bucket{_labels(labels, le=_fmt(bound))} {count}")
+            out.append(f"{name}_bucket{_labels(labels, le='+Inf')} {values[-1]}")
+            out.append(f"{name}_sum{_labels(labels)} {_fmt(values[-2])}")
+            out.append(f"{name}_count{_labels(labels)} {values[-1]}")
+
+        name = "climbge_http_requests_total"
+        out += [f"# HELP {name} API requests by status code.", f"# TYPE {name} counter"]
+        for (bp, ep, method, status), count in sorted(requests_total.items()):
+            labels = {"blueprint": bp, "endpoint": ep, "method": method, "status": status}
+            out.append(f"{name}{_labels(labels)} {count}")
+
+        name = "climbge_http_requests_in_flight"
+        out += [f"# HELP {name} Requests currently being served.", f"# TYPE {name} gauge"]
+        for snap in live:
+            out.append(f"{name}{_labels({'pid': snap['pid']})} {snap['in_flight']}")
+
+        for stat, help_text in (
+            ("pool_size", "Open DB connections."),
+            ("pool_available", "Idle DB connections."),
+            ("requests_waiting", "Requests queued for a DB connection."),
+        ):
+            name = f"climbge_db_{stat}"
+            out += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            for snap in live:
+                out.append(f"{name}{_labels({'pid': snap['pid']})} {snap['pool'].get(stat, 0)}")
+
+        for field in ("hits", "misses", "evictions"):
+            name = f"climbge_cache_{field}_total"
+            out += [f"# HELP {name} In-process cache {field}.", f"# TYPE {name} counter"]
+            for cache_name, values in sorted(caches.items()):
+                out.append(f"{name}{_labels({'cache': cache_name})} {values[field]}")
+
+        return "\n".join(out) + "\n"
+
+
+ARCHIVE_FILE = "archive.json"
+
+
+def _read_json(path: str):
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _merge_counters(snaps):
+    """Sum the counters and histograms of several snapshots."""
+    durations = {}
+    requests_total = {}
+    caches = {}
+    for snap in snaps:
+        for row in snap["durations"]:
+            key, values = tuple(row[:3]), row[3:]
+            acc = durations.setdefault(key, [0] * len(values))
+            for i, v in enumerate(values):
+                acc[i] += v
+        for row in snap["requests"]:
+            key = tuple(row[:4])
+            requests_total[key] = requests_total.get(key, 0) + row[4]
+        for c in snap.get("caches", []):
+            acc = caches.setdefault(c["name"], {"hits": 0, "misses": 0, "evictions": 0})
+            for field in acc:
+                acc[field] += c[field]
+    return durations, requests_total, caches
+
+
+def clear_multiproc_dir() -> None:
+    """Drop every snapshot left by a previous run (gunicorn on_starting)."""
+    if not METRICS_MULTIPROC_DIR:
+        return
+    for name in os.listdir(METRICS_MULTIPROC_DIR):
+        try:
+            os.remove(os.path.join(METRICS_MULTIPROC_DIR, name))
+        except OSError:
+            logger.warning("metrics cleanup failed file=%s", name, exc_info=True)
+
+
+def mark_process_dead(pid: int) -> None:
+    """
+    Fold an exited worker's counters into the archive and delete its snapshot
+    (gunicorn child_exit, which runs in the master, one worker at a time).
+    """
+    if not METRICS_MULTIPROC_DIR:
+        return
+    path = os.path.join(METRICS_MULTIPROC_DIR, f"worker_{pid}.json")
+    snap = _read_json(path)
+    if snap is not None:
+        archive_path = os.path.join(METRICS_MULTIPROC_DIR, ARCHIVE_FILE)
+        archive = _read_json(archive_path) or {"durations": [], "requests": [], "caches": []}
+        durations, requests_total, caches = _merge_counters([archive, snap])
+        merged = {
+            "pid": None,
+            "durations": [list(k) + v for k, v in durations.items()],
+            "requests": [list(k) + [v] for k, v in requests_total.items()],
+            "caches": [{"name": name, **values} for name, values in caches.items()],
+        }
+        tmp = f"{archive_path}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump(merged, fh)
+        os.replace(tmp, archive_path)
+    for leftover in (path, f"{path}.tmp"):
+        try:
+            os.remove(leftover)
+        except FileNotFoundError:
+            pass
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _fmt(v) -> str:
+    return repr(float(v))
+
+
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict, **extra) -> str:
+    items = {**labels, **extra}
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items.items()) + "}"
+
+
+metrics = Metrics()
+
+
+def install_metrics_endpoint(app: Flask) -> None:
+    """Serve the merged metrics at /metrics (outside /api, so CORS and session auth don't apply)."""
+    if not METRICS_TOKEN:
+        logger.warning("metrics endpoint disabled reason=METRICS_TOKEN unset")
+
+    @app.get("/metrics")
+    def prometheus_metrics():
+        if not METRICS_TOKEN:
+            return Response("not found\n", status=404, mimetype="text/plain")
+        supplied = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(supplied.encode(), f"Bearer {METRICS_TOKEN}".encode()):
+            return Response("forbidden\n", status=403, mimetype="text/plain")
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
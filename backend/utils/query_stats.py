@@ -0,0 +1,107 @@
+import os
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+import psycopg
+
+# Warn when a single request runs the same statement more often than this.
+DB_REPEATED_QUERY_THRESHOLD = int(os.getenv("DB_REPEATED_QUERY_THRESHOLD", "10"))
+
+_WS = re.compile(r"\s+")
+
+
+class RequestQueryStats:
+    """Statements run on behalf of one request: count, DB time, rows, and per-shape counts."""
+
+    def __init__(self):
+        self.queries = 0
+        self.total_ms = 0.0
+        self.rows = 0
+        self.by_shape = Counter()
+
+    def record(self, query, elapsed_ms: float, rowcount: int) -> None:
+        self.queries += 1
+        self.total_ms += elapsed_ms
+        if rowcount and rowcount > 0:
+            self.rows += rowcount
+        self.by_shape[_shape(query)] += 1
+
+    def repeated(self, threshold: int = DB_REPEATED_QUERY_THRESHOLD):
+        """(shape, count) pairs for statements run more than `threshold` times."""
+        return [(shape, n) for shape, n in self.by_shape.most_common() if n > threshold]
+
+
+_current: ContextVar[RequestQueryStats | None] = ContextVar("request_query_stats", default=None)
+
+
+def _shape(query) -> str:
+    # Queries are already parameterised (%s), so collapsing whitespace is
+    # enough to make repeated calls of one statement compare equal.
+    text = query if isinstance(query, str) else str(query)
+    return _WS.sub(" ", text).strip()[:200]
+
+
+def begin_request():
+    """Start collecting for the current request; returns a token for end_request()."""
+    return _current.set(RequestQueryStats())
+
+
+def current_stats() -> RequestQueryStats | None:
+    return _current.get()
+
+
+def end_request(token) -> None:
+    _current.reset(token)
+
+
+class InstrumentedCursor(psycopg.Cursor):
+    """
+    Cursor that reports each execute/executemany to the current request's
+    RequestQueryStats. Outside a request (worker, scripts) it is a plain cursor.
+    In pipeline mode the timing only covers queueing the statement.
+    """
+
+    def execute(self, query, params=None, **kwargs):
+        stats = _current.get()
+        if stats is None:
+            return super().execute(query, params, **kwargs)
+        start = time.perf_counter()
+        try:
+            return super().execute(query, params, **kwargs)
+        finally:
+            stats.record(query, (time.perf_counter() - start) * 1000, self.rowcount)
+
+    def executemany(self, query, params_seq, **kwargs):
+        stats = _current.get()
+        if stats is None:
+            return super().executemany(query, params_seq, **kwargs)
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, params_seq, **kwargs)
+        finally:
+            stats.record(query, (time.perf_counter() - start) * 1000, self.rowcount)
+
+
+class InstrumentedAsyncCursor(psycopg.AsyncCursor):
+    """InstrumentedCursor for the async pool (utils/async_db.py)."""
+
+    async def execute(self, query, params=None, **kwargs):
+        stats = _current.get()
+        if stats is None:
+            return await super().execute(query, params, **kwargs)
+        start = time.perf_counter()
+        try:
+            return await super().execute(query, params, **kwargs)
+        finally:
+            stats.record(query, (time.perf_counter() - start) * 1000, self.rowcount)
+
+    async def executemany(self, query, params_seq, **kwargs):
+        stats = _current.get()
+        if stats is None:
+            return await super().executemany(query, params_seq, **kwargs)
+        start = time.perf_counter()
+        try:
+            return await super().executemany(query, params_seq, **kwargs)
+        finally:
+            stats.record(query, (time.perf_counter() - start) * 1000, self.rowcount)
@@ -0,0 +1,214 @@
+"""
+Token-bucket rate limits for the auth endpoints (login, signup,
+forgot-password), per client IP and per username.
+
+The client IP is request.remote_addr, which ProxyFix (app.py, x_for=1) sets
+from the hop our own proxy appended. The leftmost X-Forwarded-For /
+CF-Connecting-IP value is whatever the client sent, so keying on it would let
+every request pick a fresh bucket.
+
+Each limit is "N/S": a burst of N requests that refills at N per S seconds.
+Requests over a limit get a 429 with Retry-After from a before_request hook.
+They never reach the view, so they cost no DB query, bcrypt check or email.
+
+Buckets live in memory. When RATE_LIMIT_DIR is set, they are kept in a
+memory-mapped file in that directory instead, so all gunicorn workers on the
+host share them (the same idea as METRICS_MULTIPROC_DIR). Without it every
+worker counts on its own, and a client gets up to workers x N requests.
+
+The shared table has RATE_LIMIT_SLOTS fixed slots. When it is full, the
+bucket that was used longest ago is dropped; a dropped bucket starts full
+again, so pressure on the table can only loosen a limit, never block anyone.
+"""
+import fcntl
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from flask import Flask, request
+from .http import err
+
+logger = logging.getLogger("climbge-api")
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+RATE_LIMIT_DIR = os.getenv("RATE_LIMIT_DIR") or None
+RATE_LIMIT_SLOTS = int(os.getenv("RATE_LIMIT_SLOTS", "65536"))
+
+
+def _parse_limit(name: str, default: str):
+    raw = os.getenv(name, default)
+    count, _, seconds = raw.partition("/")
+    try:
+        count, seconds = int(count), float(seconds)
+    except ValueError:
+        raise ValueError(f"{name} must look like '10/60' (requests/seconds), got {raw!r}") from None
+    if count < 1 or seconds <= 0:
+        raise ValueError(f"{name} must allow at least 1 request per positive period, got {raw!r}")
+    return count, seconds
+
+
+# endpoint -> (per-IP limit, per-username limit, JSON fields naming the account)
+AUTH_RATE_LIMITS = {
+    "api.auth.login": (
+        _parse_limit("RATE_LIMIT_LOGIN_IP", "20/60"),
+        _parse_limit("RATE_LIMIT_LOGIN_USER", "10/300"),
+        ("username",),
+    ),
+    "api.auth.signup": (
+        _parse_limit("RATE_LIMIT_SIGNUP_IP", "10/3600"),
+        _parse_limit("RATE_LIMIT_SIGNUP_USER", "5/3600"),
+        ("username",),
+    ),
+    "api.auth.forgot_password": (
+        _parse_limit("RATE_LIMIT_FORGOT_PASSWORD_IP", "5/900"),
+        _parse_limit("RATE_LIMIT_FORGOT_PASSWORD_USER", "3/3600"),
+        ("username", "email"),
+    ),
+}
+
+
+def _refill(tokens, updated, now, limit):
+    count, seconds = limit
+    return min(count, tokens + (now - updated) * count / seconds)
+
+
+def _take(tokens, limit):
+    """(tokens left, retry_after seconds or 0 when allowed)."""
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    count, seconds = limit
+    return tokens, (1 - tokens) * seconds / count
+
+
+class LocalBuckets:
+    """Per-process buckets: key -> (tokens, updated_at), LRU-bounded."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit) -> float:
+        now = time.time()
+        with self._lock:
+            tokens, updated = self._data.pop(key, (limit[0], now))
+            tokens, retry_after = _take(_refill(tokens, updated, now, limit), limit)
+            self._data[key] = (tokens, now)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return retry_after
+
+
+class SharedBuckets:
+    """
+    Buckets in an mmap'ed file shared by every process that opens it.
+
+    Slot layout: key hash (u64, 0 = empty), tokens (f64), updated_at (f64,
+    wall clock). Keys probe PROBE consecutive slots. flock serialises
+    processes and the thread lock serialises threads, since flock is held per
+    open file, not per thread.
+    """
+
+    SLOT = struct.Struct("<Qdd")
+    PROBE = 8
+
+    def __init__(self, path: str, slots: int):
+        self.slots = slots
+        self._lock = threading.Lock()
+        size = slots * self.SLOT.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self._locked():
+            if os.fstat(self._fd).st_size != size:
+                os.ftruncate(self._fd, size)
+        self._mm = mmap.mmap(self._fd, size)
+
+    @contextmanager
+    def _locked(self):
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def hit(self, key: str, limit) -> float:
+        h = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+        start = h % self.slots
+        now = time.time()
+        with self._lock, self._locked():
+            victim, victim_updated = None, math.inf
+            for i in range(self.PROBE):
+                offset = ((start + i) % self.slots) * self.SLOT.size
+                slot_hash, tokens, updated = self.SLOT.unpack_from(self._mm, offset)
+                if slot_hash == h:
+                    break
+                if slot_hash == 0:
+                    tokens, updated = limit[0], now
+                    break
+                if updated < victim_updated:
+                    victim, victim_updated = offset, updated
+            else:
+                offset, tokens, updated = victim, limit[0], now
+            tokens, retry_after = _take(_refill(tokens, updated, now, limit), limit)
+            self.SLOT.pack_into(self._mm, offset, h, tokens, now)
+        return retry_after
+
+
+def _open_buckets():
+    if RATE_LIMIT_DIR:
+        os.makedirs(RATE_LIMIT_DIR, exist_ok=True)
+        return SharedBuckets(os.path.join(RATE_LIMIT_DIR, "buckets"), RATE_LIMIT_SLOTS)
+    return LocalBuckets(RATE_LIMIT_SLOTS)
+
+
+buckets = _open_buckets()
+
+
+def _account(fields):
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return None
+    for field in fields:
+        value = body.get(field)
+        if isinstance(value, str) and value.strip():
+            return f"{field}:{value.strip().lower()}"
+    return None
+
+
+def install_rate_limits(app: Flask) -> None:
+    """Install after the request logging hooks so rejected requests are still logged and timed."""
+    if not RATE_LIMIT_ENABLED:
+        return
+
+    @app.before_request
+    def _rate_limit():
+        rule = AUTH_RATE_LIMITS.get(request.endpoint)
+        if rule is None or request.method != "POST":
+            return None
+        ip_limit, user_limit, fields = rule
+        ip = request.remote_addr
+        retry_after = buckets.hit(f"{request.endpoint}|ip:{ip}", ip_limit)
+        scope = "ip"
+        if not retry_after:
+            account = _account(fields)
+            if account is not None:
+                retry_after = buckets.hit(f"{request.endpoint}|{account}", user_limit)
+                scope = "user"
+        if not retry_after:
+            return None
+
+        logger.warning(
+            "rate_limited endpoint=%s scope=%s ip=%s retry_after=%.0f",
+            request.endpoint,
+            scope,
+            ip,
+            retry_after,
+        )
+        resp, status = err("rate_limited", "Too many attempts. Please try again later.", 429)
+        resp.headers["Retry-After"] = str(math.ceil(retry_after))
+        return resp, status
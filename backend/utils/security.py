@@ -1,17 +1,65 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import bcrypt
 from flask import session
 
 SESSION_KEY = "user_id"
 
-def hash_password(plain: str) -> str:
-    return bcrypt.hashpw(plain.encode(), bcrypt.gensalt()).decode()
+# bcrypt work factor for new hashes. Existing hashes with a different cost are
+# upgraded on the next successful login (see needs_rehash).
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
 
-def verify_password(plain: str, hashed: str) -> bool:
+# bcrypt runs on a small dedicated pool so a login burst can only pin
+# BCRYPT_MAX_WORKERS cores; anything beyond BCRYPT_MAX_PENDING queued jobs is
+# rejected immediately instead of tying up request threads.
+BCRYPT_MAX_WORKERS = int(os.getenv("BCRYPT_MAX_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", "16"))
+
+_bcrypt_pool = ThreadPoolExecutor(max_workers=BCRYPT_MAX_WORKERS, thread_name_prefix="bcrypt")
+_bcrypt_slots = threading.BoundedSemaphore(BCRYPT_MAX_WORKERS + BCRYPT_MAX_PENDING)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the bcrypt pool is saturated; callers should answer 503."""
+
+
+def _run_bcrypt(fn, *args):
+    if not _bcrypt_slots.acquire(blocking=False):
+        raise PasswordHasherBusy("bcrypt queue is full")
+    try:
+        future = _bcrypt_pool.submit(fn, *args)
+    except Exception:
+        _bcrypt_slots.release()
+        raise
+    future.add_done_callback(lambda _: _bcrypt_slots.release())
+    return future.result()
+
+
+def _hash(plain: str) -> str:
+    return bcrypt.hashpw(plain.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
+
+
+def _check(plain: str, hashed: str) -> bool:
     try:
         return bcrypt.checkpw(plain.encode(), hashed.encode())
     except Exception:
         return False
 
+
+def hash_password(plain: str) -> str:
+    return _run_bcrypt(_hash, plain)
+
+def verify_password(plain: str, hashed: str) -> bool:
+    return _run_bcrypt(_check, plain, hashed)
+
+def needs_rehash(hashed: str) -> bool:
+    """True when a stored hash ($2b$<cost>$...) was made with a different work factor."""
+    try:
+        return int(hashed.split("$")[2]) != BCRYPT_ROUNDS
+    except (AttributeError, IndexError, ValueError):
+        return False
+
 def login_user(user_id: str):
     session[SESSION_KEY] = user_id
 
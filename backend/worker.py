@@ -0,0 +1,92 @@
+import os
+import signal
+import time
+from dotenv import load_dotenv
+env_file = os.environ.get('ENV_DIR', '.env')
+if os.path.exists(env_file):
+    load_dotenv(env_file)
+
+from utils.logger import setup_logging  # noqa: E402
+from utils.mail import SMTPMailer, send_password_reset_email  # noqa: E402
+from services.job_service import (  # noqa: E402
+    JOB_PASSWORD_RESET_EMAIL,
+    claim_jobs,
+    complete_job,
+    fail_job,
+)
+
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+JOB_BATCH_SIZE = int(os.getenv("JOB_BATCH_SIZE", "10"))
+
+setup_logging('climbge-api')
+worker_logger = setup_logging('climbge-worker')
+
+mailer = SMTPMailer()
+
+
+def _send_password_reset(payload: dict) -> None:
+    send_password_reset_email(payload["to_email"], payload["reset_link"], mailer=mailer)
+
+
+JOB_HANDLERS = {
+    JOB_PASSWORD_RESET_EMAIL: _send_password_reset,
+}
+
+
+def _record(job: dict, action, *args) -> bool:
+    """
+    Run complete_job/fail_job without letting a DB error kill the worker. Each
+    call checks out its own pool connection, and the pool drops a broken one,
+    so the next call gets a fresh connection. A job whose status could not be
+    recorded stays 'running' and is claimed again after JOB_LOCK_TIMEOUT_SECONDS.
+    """
+    try:
+        action(*args)
+        return True
+    except Exception:
+        worker_logger.exception("job_bookkeeping failed action=%s job_id=%s", action.__name__, job["id"])
+        return False
+
+
+def run_job(job: dict) -> None:
+    handler = JOB_HANDLERS.get(job["job_type"])
+    if handler is None:
+        _record(job, fail_job, job, f"no handler for job_type={job['job_type']}")
+        return
+    try:
+        handler(job["payload"])
+    except Exception as exc:
+        worker_logger.exception("job_error job_id=%s job_type=%s", job["id"], job["job_type"])
+        _record(job, fail_job, job, f"{type(exc).__name__}: {exc}")
+        return
+    if _record(job, complete_job, job["id"]):
+        worker_logger.info("job_done job_id=%s job_type=%s attempts=%s", job["id"], job["job_type"], job["attempts"])
+
+
+def main() -> None:
+    stopping = False
+
+    def _stop(signum, _frame):
+        nonlocal stopping
+        worker_logger.info("worker stopping signal=%s", signum)
+        stopping = True
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    worker_logger.info("worker started poll_interval=%ss batch_size=%s", JOB_POLL_INTERVAL, JOB_BATCH_SIZE)
+    while not stopping:
+        try:
+            jobs = claim_jobs(JOB_BATCH_SIZE)
+        except Exception:
+            worker_logger.exception("job_claim failed")
+            jobs = []
+        for job in jobs:
+            run_job(job)
+        if not jobs:
+            time.sleep(JOB_POLL_INTERVAL)
+    mailer.close()
+
+
+if __name__ == "__main__":
+    main()
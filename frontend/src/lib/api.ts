@@ -19,7 +19,7 @@ type ApiErrorCode =
   | 'NETWORK_ERROR'
   | 'UNKNOWN';
 
-type HistoryResp = HistoricalClimb[] | { history: HistoricalClimb[] };
+type HistoryResp = HistoricalClimb[] | { history: HistoricalClimb[]; next_cursor?: string | null };
 
 export class ApiError extends Error {
   code: ApiErrorCode;
@@ -156,10 +156,16 @@ export function apiLastClimb() {
   return fetchJSON<LastClimb>("/api/last-climb");
 }
 
-export async function apiHistoricalClimb(): Promise<HistoricalClimb[]> {
-  const json = await fetchJSON<HistoryResp>("/api/history");
+// One page of history, newest first. Pass the returned nextCursor back to get
+// the following page; it is null on the last page.
+export async function apiHistoricalClimb(
+  cursor?: string | null,
+): Promise<{ history: HistoricalClimb[]; nextCursor: string | null }> {
+  const url = cursor ? `/api/history?cursor=${encodeURIComponent(cursor)}` : "/api/history";
+  const json = await fetchJSON<HistoryResp>(url);
   const data: any = json ?? {};
-  return Array.isArray(data) ? data : (data.history ?? []);
+  if (Array.isArray(data)) return { history: data, nextCursor: null };
+  return { history: data.history ?? [], nextCursor: data.next_cursor ?? null };
 }
 
 export async function apiNews(): Promise<NewsPost[]> {
@@ -9,12 +9,15 @@ export function HistoryTab() {
   const [sessions, setSessions] = useState<HistoricalClimb[]>([]);
   const [loading, setLoading] = useState(true);
   const [err, setErr] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     (async () => {
       try {
-        const rows = await apiHistoricalClimb(); // returns HistoricalClimb[]
-        setSessions(rows ?? []);
+        const page = await apiHistoricalClimb();
+        setSessions(page.history);
+        setNextCursor(page.nextCursor);
       } catch (e: unknown) {
         const msg = e instanceof Error ? e.message : "Failed to load sessions";
         setErr(msg);
@@ -25,6 +28,21 @@ export function HistoryTab() {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []);
 
+  async function loadMore() {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const page = await apiHistoricalClimb(nextCursor);
+      setSessions((prev) => [...prev, ...page.history]);
+      setNextCursor(page.nextCursor);
+    } catch (e: unknown) {
+      const msg = e instanceof Error ? e.message : "Failed to load sessions";
+      setErr(msg);
+    } finally {
+      setLoadingMore(false);
+    }
+  }
+
   return (
     <div className="min-h-screen bg-[#FFFDF8] text-[#2A1B00]">
       <div className="mx-auto w-full max-w-md px-6 pt-10 pb-24">
@@ -67,6 +85,17 @@ export function HistoryTab() {
                 ))}
               </ul>
             )}
+
+            {!loading && nextCursor && (
+              <button
+                type="button"
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="mt-5 w-full rounded-xl bg-[#FFF6ED] py-2 text-sm font-medium text-[#8A5A00] ring-1 ring-[#F5D7B3] disabled:opacity-60"
+              >
+                {loadingMore ? "Loading…" : "Load more"}
+              </button>
+            )}
           </CardContent>
         </Card>
       </div>
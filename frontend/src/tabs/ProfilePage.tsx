@@ -71,7 +71,7 @@ export function ProfileTab({ userProfile, onLogout }: ProfileTabProps) {
   const isApprover = userProfile?.role === 'admin' || userProfile?.role === 'approver';
   const [reviewDialogOpen, setReviewDialogOpen] = useState(false);
   const [approvalQueue, setApprovalQueue] = useState<ApprovalQueue | null>(null);
-  const pendingCount = (approvalQueue?.grade_queue.length ?? 0) + (approvalQueue?.climb_queue.length ?? 0);
+  const pendingCount = (approvalQueue?.counts.grade ?? 0) + (approvalQueue?.counts.location ?? 0);
 
   async function refreshApprovalQueue() {
     try {
@@ -47,6 +47,10 @@ export type PendingGymLocation = {
 export type ApprovalQueue = {
   grade_queue: PendingGradeSystem[];
   climb_queue: PendingGymLocation[];
+  // Cursors for the next page of each queue; null when there are no more rows.
+  next_cursor: { grade: string | null; location: string | null };
+  // Total queue sizes, independent of paging and filters.
+  counts: { grade: number; location: number };
 };
 
 export type ApprovalDecision = {